@@ -0,0 +1,99 @@
+"""
+Caché opcional en Redis
+Si REDIS_URL no está configurado (o Redis falla) la app funciona igual, sin caché
+"""
+
+import asyncio
+import logging
+import orjson
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# Cliente de Redis (se inicializa en startup solo si hay REDIS_URL)
+redis_client = None
+
+# Cargas en curso por clave (single-flight, por proceso; no requiere Redis)
+_inflight: Dict[str, asyncio.Task] = {}
+
+T = TypeVar("T")
+
+
+async def connect_to_redis():
+    """Conectar a Redis si está configurado"""
+    global redis_client
+
+    if not settings.REDIS_URL:
+        logger.info("ℹ️ REDIS_URL no configurado: caché deshabilitada")
+        return
+
+    try:
+        import redis.asyncio as redis
+
+        client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+        await client.ping()
+        redis_client = client
+        logger.info("✅ Conectado a Redis (caché habilitada)")
+    except Exception as e:
+        # La caché es una optimización: sin Redis se sigue leyendo de MongoDB
+        logger.warning(f"⚠️ No se pudo conectar a Redis, caché deshabilitada: {e}")
+
+
+async def close_redis_connection():
+    """Cerrar conexión a Redis"""
+    global redis_client
+
+    if redis_client:
+        await redis_client.aclose()
+        redis_client = None
+        logger.info("🔌 Conexión a Redis cerrada")
+
+
+async def cache_get(key: str) -> Optional[Any]:
+    """Leer un valor JSON de la caché. None si no existe o no hay caché."""
+    if not redis_client:
+        return None
+    try:
+        raw = await redis_client.get(key)
+    except Exception as e:
+        logger.warning(f"⚠️ Error leyendo caché ({key}): {e}")
+        return None
+    return orjson.loads(raw) if raw is not None else None
+
+
+async def cache_set(key: str, value: Any, ttl: int) -> None:
+    """Guardar un valor JSON en la caché con expiración (segundos)"""
+    if not redis_client:
+        return
+    try:
+        await redis_client.set(key, orjson.dumps(value), ex=ttl)
+    except Exception as e:
+        logger.warning(f"⚠️ Error escribiendo caché ({key}): {e}")
+
+
+async def cache_delete(*keys: str) -> None:
+    """Invalidar una o varias claves"""
+    if not redis_client or not keys:
+        return
+    try:
+        await redis_client.delete(*keys)
+    except Exception as e:
+        logger.warning(f"⚠️ Error invalidando caché: {e}")
+
+
+async def single_flight(key: str, loader: Callable[[], Awaitable[T]]) -> T:
+    """
+    Ejecuta loader una sola vez para todas las peticiones concurrentes con la misma clave.
+    
+    La primera petición lanza la carga como tarea; las demás esperan ese mismo
+    resultado (o excepción). La tarea no se cancela si la petición que la lanzó
+    se desconecta (shield). Al terminar se retira la clave: no es una caché.
+    """
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(loader())
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return await asyncio.shield(task)
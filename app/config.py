@@ -18,6 +18,15 @@ class Settings(BaseSettings):
     # MongoDB Atlas
     MONGODB_URL: str
     MONGODB_DB_NAME: str = "dulcevicio_db"
+    MONGODB_MAX_POOL_SIZE: int = 50  # Conexiones máximas por worker
+    MONGODB_MIN_POOL_SIZE: int = 10  # Conexiones que el driver mantiene abiertas (pool caliente)
+    
+    # Redis (opcional): caché de lecturas de cursos. Sin REDIS_URL no hay caché
+    REDIS_URL: Optional[str] = None
+    COURSE_CACHE_TTL_SECONDS: int = 60
+    COURSE_LIST_CACHE_TTL_SECONDS: int = 30
+    LESSONS_CACHE_TTL_SECONDS: int = 3600  # Versionadas por updated_at del curso: no requieren invalidación
+    PROGRESS_FLUSH_INTERVAL_SECONDS: int = 10  # Con Redis: cada cuánto se vuelca el progreso de video a MongoDB
     
     # JWT Authentication
     SECRET_KEY: str
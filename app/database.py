@@ -2,16 +2,19 @@
 Configuración de conexión a MongoDB Atlas usando Beanie
 """
 
-from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
+from pymongo import AsyncMongoClient
 from beanie import init_beanie
 from app.config import settings
+from app.models.user import User
+from app.models.course import Course
 import logging
 
 logger = logging.getLogger(__name__)
 
 
 # Cliente de MongoDB (se inicializa en startup)
-mongodb_client: AsyncIOMotorClient = None
+mongodb_client: AsyncMongoClient = None
 
 
 async def connect_to_mongo():
@@ -20,16 +23,18 @@ async def connect_to_mongo():
     
     try:
         logger.info("Conectando a MongoDB Atlas...")
-        mongodb_client = AsyncIOMotorClient(settings.MONGODB_URL)
+        # Driver asíncrono nativo de PyMongo (Motor delegaba la E/S a un pool de hilos)
+        mongodb_client = AsyncMongoClient(
+            settings.MONGODB_URL,
+            maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+            minPoolSize=settings.MONGODB_MIN_POOL_SIZE
+        )
         
         # Verificar conexión
         await mongodb_client.admin.command('ping')
         logger.info("✅ Conectado exitosamente a MongoDB Atlas")
         
         # Inicializar Beanie con los modelos
-        # Por ahora solo importamos User, agregaremos más modelos después
-        from app.models.user import User
-        
         await init_beanie(
             database=mongodb_client[settings.MONGODB_DB_NAME],
             document_models=[
@@ -38,12 +43,18 @@ async def connect_to_mongo():
                 "app.models.course.CourseReview",
                 "app.models.lesson.Lesson",
                 "app.models.lesson.LessonComment",
+                "app.models.lesson.LessonCounter",
                 "app.models.enrollment.Enrollment"
             ]
         )
         
         logger.info(f"✅ Beanie inicializado con base de datos: {settings.MONGODB_DB_NAME}")
         
+        # Pre-calentar: consultas concurrentes a las colecciones más usadas para abrir
+        # conexiones del pool antes de la primera petición real
+        await asyncio.gather(User.find_one({}), Course.find_one({}))
+        logger.info("🔥 Pool de conexiones pre-calentado")
+        
     except Exception as e:
         logger.error(f"❌ Error conectando a MongoDB: {e}")
         raise
@@ -54,5 +65,5 @@ async def close_mongo_connection():
     global mongodb_client
     
     if mongodb_client:
-        mongodb_client.close()
+        await mongodb_client.close()
         logger.info("🔌 Conexión a MongoDB cerrada")
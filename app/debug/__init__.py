@@ -0,0 +1,3 @@
+"""
+Herramientas de diagnóstico (uso local): python -m app.debug --help
+"""
@@ -0,0 +1,173 @@
+"""
+CLI de diagnóstico: reemplaza los scripts sueltos debug_env.py, debug_internal.py,
+debug_req.py y fix_env.py por un solo intérprete con subcomandos.
+
+Uso:
+    python -m app.debug env            # (alias: check) verificar carga de .env y Settings
+    python -m app.debug fix-env        # re-escribir .env como UTF-8 limpio
+    python -m app.debug internal       # crear usuario de prueba vía AuthService
+    python -m app.debug req            # crear usuario de prueba vía HTTP (API corriendo)
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import traceback
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+
+ENV_PATH = Path.cwd() / ".env"
+
+
+def cmd_env(args: argparse.Namespace) -> int:
+    """Verificar que .env existe y que Settings (Pydantic) carga correctamente"""
+    print("--- Debugging .env loading ---")
+    print(f"Current working directory: {Path.cwd()}")
+    print(f"Checking for .env at: {ENV_PATH}")
+    print(".env file FOUND." if ENV_PATH.exists() else ".env file NOT FOUND.")
+
+    load_dotenv(ENV_PATH)
+
+    mongo_url = os.getenv("MONGODB_URL")
+    secret_key = os.getenv("SECRET_KEY")
+
+    print(f"MONGODB_URL loaded: {'YES' if mongo_url else 'NO'}")
+    print(f"SECRET_KEY loaded: {'YES' if secret_key else 'NO'}")
+
+    if mongo_url:
+        print(f"MONGODB_URL value (first 20 chars): {mongo_url[:20]}...")
+    else:
+        print("MONGODB_URL is None")
+
+    try:
+        from app.config import settings  # noqa: F401
+        print("Settings loaded successfully via Pydantic!")
+    except Exception as e:
+        print(f"Pydantic Settings failed to load: {e}")
+        return 1
+    return 0
+
+
+def cmd_fix_env(args: argparse.Namespace) -> int:
+    """
+    Re-escribir .env como UTF-8 sin BOM.
+    Editores/PowerShell a veces lo guardan en UTF-16 o con BOM y python-dotenv no lo lee.
+    """
+    if not ENV_PATH.exists():
+        print(f".env file NOT FOUND at: {ENV_PATH}")
+        return 1
+
+    raw = ENV_PATH.read_bytes()
+    if raw.startswith((b"\xff\xfe", b"\xfe\xff")):
+        content = raw.decode("utf-16")
+    else:
+        content = raw.decode("utf-8-sig")
+
+    print(f"Writing clean UTF-8 .env to: {ENV_PATH}")
+    ENV_PATH.write_bytes(content.replace("\r\n", "\n").encode("utf-8"))
+    print("Done. File size:", ENV_PATH.stat().st_size)
+    return 0
+
+
+def _debug_user_payload(args: argparse.Namespace) -> dict:
+    return {
+        "email": args.email,
+        "password": args.password,
+        "full_name": args.full_name,
+        "username": args.username,
+        "role": args.role,
+    }
+
+
+async def _register_internal(args: argparse.Namespace) -> None:
+    from app.database import connect_to_mongo, close_mongo_connection
+    from app.services.auth_service import auth_service
+    from app.schemas.user_schema import UserCreate
+
+    print("Connecting to DB...")
+    await connect_to_mongo()
+    print("Connected.")
+    try:
+        print("Attempting register_user...")
+        user = await auth_service.register_user(UserCreate(**_debug_user_payload(args)), created_by=None)
+        print(f"Success! User created: {user.email}")
+    finally:
+        await close_mongo_connection()
+
+
+def cmd_internal(args: argparse.Namespace) -> int:
+    """Crear un usuario directamente con AuthService (sin pasar por HTTP)"""
+    try:
+        asyncio.run(_register_internal(args))
+    except Exception:
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+def cmd_req(args: argparse.Namespace) -> int:
+    """Crear un usuario con POST /api/users contra una API en ejecución"""
+    data = json.dumps(_debug_user_payload(args)).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    if args.token:
+        headers["Authorization"] = f"Bearer {args.token}"
+    req = urllib.request.Request(f"{args.url.rstrip('/')}/api/users", data=data, headers=headers, method="POST")
+
+    try:
+        with urllib.request.urlopen(req) as response:
+            print(f"Status Code: {response.status}")
+            print(f"Response: {response.read().decode()}")
+    except urllib.error.HTTPError as e:
+        print(f"HTTP Error: {e.code}")
+        print(f"Response: {e.read().decode()}")
+        return 1
+    except Exception as e:
+        print(f"Error: {e}")
+        return 1
+    return 0
+
+
+def _add_user_args(parser: argparse.ArgumentParser, default_email: str, default_username: str) -> None:
+    parser.add_argument("--email", default=default_email)
+    parser.add_argument("--username", default=default_username)
+    parser.add_argument("--password", default="Password123")
+    parser.add_argument("--full-name", dest="full_name", default="Debug User")
+    parser.add_argument("--role", default="SUPERADMIN")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.debug", description="Diagnóstico local de DulceVizzio Service")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_env = sub.add_parser("env", aliases=["check"], help="Verificar .env y Settings")
+    p_env.set_defaults(func=cmd_env)
+
+    p_fix = sub.add_parser("fix-env", help="Re-escribir .env como UTF-8 limpio")
+    p_fix.set_defaults(func=cmd_fix_env)
+
+    p_internal = sub.add_parser("internal", help="Crear usuario de prueba vía AuthService")
+    _add_user_args(p_internal, "debug_internal@example.com", "debuginternal")
+    p_internal.set_defaults(func=cmd_internal)
+
+    p_req = sub.add_parser("req", help="Crear usuario de prueba vía POST /api/users")
+    _add_user_args(p_req, "debug_user@example.com", "debuguser")
+    p_req.add_argument("--url", default="http://127.0.0.1:8000")
+    p_req.add_argument("--token", default=None, help="Token Bearer de un SUPERADMIN")
+    p_req.set_defaults(func=cmd_req)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
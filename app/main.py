@@ -3,9 +3,10 @@ DulceVicio API - FastAPI Application
 Plataforma de cursos de repostería con MongoDB Atlas
 """
 
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 import logging
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
@@ -13,6 +14,9 @@ from slowapi.errors import RateLimitExceeded
 
 from app.config import settings
 from app.database import connect_to_mongo, close_mongo_connection
+from app import cache
+from app.cache import connect_to_redis, close_redis_connection
+from app.services.enrollment_service import EnrollmentService, run_progress_flusher
 
 # Configurar logging
 logging.basicConfig(
@@ -28,13 +32,28 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("🚀 Iniciando DulceVicio API...")
     await connect_to_mongo()
+    await connect_to_redis()
+    # Con Redis el progreso de video se bufferiza y se vuelca por lotes
+    progress_flusher = asyncio.create_task(run_progress_flusher()) if cache.redis_client else None
     logger.info("✅ Aplicación lista!")
     
     yield
     
     # Shutdown
     logger.info("🛑 Cerrando aplicación...")
+    if progress_flusher:
+        # Esperar a que la tarea termine: su volcado y el final no deben solaparse
+        progress_flusher.cancel()
+        with suppress(asyncio.CancelledError):
+            await progress_flusher
+        try:
+            # Último volcado para no perder el progreso pendiente
+            while await EnrollmentService.flush_progress_buffer():
+                pass
+        except Exception as e:
+            logger.error(f"❌ Error volcando progreso pendiente: {e}")
     await close_mongo_connection()
+    await close_redis_connection()
     logger.info("👋 Aplicación cerrada")
 
 
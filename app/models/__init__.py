@@ -3,9 +3,9 @@ Modelos de base de datos MongoDB usando Beanie ODM
 """
 
 from .user import User
-from .course import Course, CourseReview
-from .lesson import Lesson, LessonMaterial, LessonComment
-from .enrollment import Enrollment
+from .course import Course, CourseReview, CourseListView
+from .lesson import Lesson, LessonMaterial, LessonComment, LessonCounter
+from .enrollment import Enrollment, EnrollmentCourseView, EnrollmentExpiryView
 from .enums import Role, CourseStatus, CourseDifficulty, EnrollmentStatus
 
 __all__ = [
@@ -13,10 +13,14 @@ __all__ = [
     "Role",
     "Course",
     "CourseReview",
+    "CourseListView",
     "Lesson",
     "LessonMaterial",
     "LessonComment",
+    "LessonCounter",
     "Enrollment",
+    "EnrollmentCourseView",
+    "EnrollmentExpiryView",
     "CourseStatus",
     "CourseDifficulty",
     "EnrollmentStatus",
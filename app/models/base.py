@@ -1,16 +1,44 @@
-from datetime import datetime
+import os
+import threading
+from datetime import datetime, timezone
 from typing import Optional
-from uuid import UUID, uuid4
+from uuid import UUID
 from beanie import Document, before_event, Save, Replace, Update
 from pydantic import Field
 
+# Buffer de entropía por hilo: un os.urandom cada 128 revisiones en lugar de uno por escritura
+_REVISION_POOL_SIZE = 2048
+_revision_entropy = threading.local()
+
+def utcnow() -> datetime:
+    """
+    Instante actual en UTC sin tzinfo (datetime.utcnow está deprecado desde Python 3.12).
+    Mongo devuelve fechas naive, así que todo lo que se guarda y compara usa este formato.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _new_revision_id() -> UUID:
+    """UUID4 construido con 16 bytes tomados del buffer de entropía del hilo actual."""
+    buf = getattr(_revision_entropy, "buf", b"")
+    pos = getattr(_revision_entropy, "pos", 0)
+    
+    if pos >= len(buf):
+        buf = os.urandom(_REVISION_POOL_SIZE)
+        pos = 0
+        _revision_entropy.buf = buf
+    
+    _revision_entropy.pos = pos + 16
+    return UUID(bytes=buf[pos:pos + 16], version=4)
+
+
 class BaseDocument(Document):
     """
     Modelo base que extiende Beanie Document.
     Incluye campos de auditoría automática.
     """
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=utcnow)
+    updated_at: datetime = Field(default_factory=utcnow)
     created_by: Optional[str] = None 
     updated_by: Optional[str] = None  
     
@@ -30,5 +58,5 @@ class BaseDocument(Document):
         Hook que se ejecuta automáticamente antes de guardar/actualizar.
         Actualiza el campo updated_at y genera nueva revisión.
         """
-        self.updated_at = datetime.utcnow()
-        self.revision_id = uuid4()  # Genera nueva versión en cada cambio
+        self.updated_at = utcnow()
+        self.revision_id = _new_revision_id()  # Genera nueva versión en cada cambio
@@ -3,7 +3,8 @@ Modelos de Curso y componentes relacionados
 """
 
 from beanie import Indexed, PydanticObjectId
-from pydantic import Field, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl
+from pymongo import IndexModel
 from typing import Optional, List
 from datetime import datetime
 from .base import BaseDocument
@@ -54,7 +55,7 @@ class Course(BaseDocument):
     
     # Información básica
     title: Indexed(str) = Field(..., description="Título del curso")
-    slug: Indexed(str, unique=True) = Field(..., description="Slug único para URL")
+    slug: str = Field(..., description="Slug único para URL (índice único en Settings.indexes)")
     description: str = Field(..., description="Descripción completa del curso")
     # Categorización
     category: Indexed(str) = Field(..., description="Categoría principal")
@@ -91,7 +92,27 @@ class Course(BaseDocument):
     class Settings:
         name = "courses"
         indexes = [
-            "slug",
+            # Slug único. Antes el índice simple "slug" declarado aquí anulaba el
+            # Indexed(unique=True) del campo. Se usa un índice parcial con nombre propio
+            # para poder convivir con el slug_1 no único ya existente en la BD.
+            IndexModel(
+                [("slug", 1)],
+                unique=True,
+                partialFilterExpression={"slug": {"$type": "string"}},
+                name="slug_partial_unique"
+            ),
+            # Listado público: igualdad en status/is_deleted y orden por _id descendente
+            # (el mismo orden de get_courses), sin sort en memoria
+            IndexModel(
+                [("status", 1), ("is_deleted", 1), ("_id", -1)],
+                name="pub_list"
+            ),
+            # Búsqueda de texto (tokenizada y con stemming en español) para ?search=
+            IndexModel(
+                [("title", "text"), ("description", "text"), ("category", "text")],
+                name="course_text",
+                default_language="spanish"
+            ),
             "title",
             "category",
             "subcategory",
@@ -127,3 +148,48 @@ class Course(BaseDocument):
     
     def __str__(self):
         return self.title
+
+
+class CourseListView(BaseModel):
+    """
+    Proyección de Course con solo los campos del listado (GET /api/courses).
+    Evita traer de MongoDB los campos que el listado no devuelve.
+    """
+    id: PydanticObjectId = Field(alias="_id")
+    title: str
+    slug: str
+    description: str
+    category: str
+    subcategory: Optional[str] = None
+    tags: List[str] = Field(default_factory=list)
+    difficulty: CourseDifficulty
+    price: float
+    currency: str = "USD"
+    cover_image_url: Optional[str] = None
+    status: CourseStatus
+    rating_average: Optional[float] = None
+    enrollment_count: int = 0
+    lessons_count: int = 0
+    total_duration_hours: float = 0.0
+    created_at: datetime
+    
+    class Settings:
+        projection = {
+            "_id": 1,
+            "title": 1,
+            "slug": 1,
+            "description": 1,
+            "category": 1,
+            "subcategory": 1,
+            "tags": 1,
+            "difficulty": 1,
+            "price": 1,
+            "currency": 1,
+            "cover_image_url": 1,
+            "status": 1,
+            "rating_average": 1,
+            "enrollment_count": 1,
+            "lessons_count": 1,
+            "total_duration_hours": 1,
+            "created_at": 1,
+        }
@@ -4,11 +4,12 @@ Sistema de pago individual por curso con expiración
 """
 
 from beanie import PydanticObjectId
-from pydantic import Field, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl
+from pymongo import IndexModel
 from typing import Optional
 from datetime import datetime, timedelta
 from .enums import EnrollmentStatus
-from .base import BaseDocument
+from .base import BaseDocument, utcnow
 
 
 class Enrollment(BaseDocument):
@@ -25,7 +26,7 @@ class Enrollment(BaseDocument):
     
     # Estado y fechas
     status: EnrollmentStatus = Field(default=EnrollmentStatus.ACTIVE, description="Estado de la inscripción")
-    enrolled_at: datetime = Field(default_factory=datetime.utcnow, description="Fecha de inscripción")
+    enrolled_at: datetime = Field(default_factory=utcnow, description="Fecha de inscripción")
     expires_at: datetime = Field(..., description="Fecha de expiración (1 año desde inscripción)")
     
     # Tracking de progreso de video
@@ -48,7 +49,23 @@ class Enrollment(BaseDocument):
             "status",
             ("user_id", "course_id"),  # Índice compuesto único
             "expires_at",
-            "enrolled_at"
+            "enrolled_at",
+            # Inscripción vigente de un usuario: is_enrolled de cursos, acceso a lecciones,
+            # duplicados al inscribir (igualdad user/course/status + rango en expires_at)
+            IndexModel(
+                [("user_id", 1), ("course_id", 1), ("status", 1), ("expires_at", 1)],
+                name="user_course_active"
+            ),
+            # Consultas administrativas por curso y estado
+            IndexModel(
+                [("course_id", 1), ("status", 1)],
+                name="course_status"
+            ),
+            # "Mis inscripciones": filtro por usuario + orden enrolled_at descendente sin sort en memoria
+            IndexModel(
+                [("user_id", 1), ("enrolled_at", -1)],
+                name="user_enrolled_at"
+            ),
         ]
     
     class Config:
@@ -83,7 +100,7 @@ class Enrollment(BaseDocument):
         Returns:
             Enrollment: Inscripción con expires_at calculado
         """
-        enrolled_at = datetime.utcnow()
+        enrolled_at = utcnow()
         expires_at = enrolled_at + timedelta(days=365)  # 1 año
         
         return cls(
@@ -106,7 +123,7 @@ class Enrollment(BaseDocument):
             return False
         
         # Verificar fecha
-        if datetime.utcnow() >= self.expires_at:
+        if utcnow() >= self.expires_at:
             # Expiró: Actualizar estado (Lazy Update)
             self.status = EnrollmentStatus.EXPIRED
             await self.save()
@@ -121,5 +138,21 @@ class Enrollment(BaseDocument):
         Returns:
             int: Días restantes (0 si expiró, negativo si ya expiró hace X días)
         """
-        delta = self.expires_at - datetime.utcnow()
+        delta = self.expires_at - utcnow()
         return delta.days
+
+
+class EnrollmentCourseView(BaseModel):
+    """
+    Proyección mínima de Enrollment: solo course_id.
+    Usada para marcar is_enrolled sin traer las inscripciones completas.
+    """
+    course_id: PydanticObjectId
+
+
+class EnrollmentExpiryView(BaseModel):
+    """
+    Proyección mínima de Enrollment: solo expires_at.
+    Usada por el buffer de progreso para saber hasta cuándo es vigente sin releer MongoDB.
+    """
+    expires_at: datetime
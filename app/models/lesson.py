@@ -2,11 +2,12 @@
 Modelos de Lección y componentes relacionados
 """
 
-from beanie import PydanticObjectId
+from beanie import Document, PydanticObjectId
 from pydantic import BaseModel, Field, HttpUrl
-from typing import Optional, List
+from pymongo import IndexModel
+from typing import Any, Dict, Optional, List
 from datetime import datetime
-from .base import BaseDocument
+from .base import BaseDocument, utcnow
 
 
 class LessonMaterial(BaseModel):
@@ -19,7 +20,7 @@ class LessonMaterial(BaseModel):
     file_format: Optional[str] = Field(None, description="Formato del archivo (pdf, jpg, etc)")
     is_downloadable: bool = Field(default=True, description="Si es descargable")
     order: int = Field(default=1, description="Orden del archivo")
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=utcnow)
     created_by: Optional[str] = None
     
     # NO tiene Settings, NO tiene colección propia
@@ -80,7 +81,17 @@ class Lesson(BaseDocument):
    
     class Settings:
         name = "lessons"
-        indexes = ["course_id", "order", "is_preview"]
+        indexes = [
+            # Lecciones de un curso en orden (listados, reordenar, re-secuenciar al borrar):
+            # igualdad en course_id + orden por order recorriendo el índice, sin sort en memoria.
+            # También cubre las consultas solo por course_id
+            IndexModel(
+                [("course_id", 1), ("order", 1)],
+                name="course_order"
+            ),
+            "order",
+            "is_preview"
+        ]
     
     class Config:
         json_schema_extra = {
@@ -95,3 +106,27 @@ class Lesson(BaseDocument):
                 "materials": []
             }
         }
+
+
+class LessonCounter(Document):
+    """
+    Contador del último orden asignado a las lecciones de un curso
+    _id = course_id; se incrementa atómicamente ($inc) al crear una lección
+    """
+    id: PydanticObjectId = Field(..., description="ID del curso")
+    seq: int = Field(default=0, description="Último orden asignado")
+
+    class Settings:
+        name = "lesson_counters"
+
+
+def lesson_gating_stage(visible: Any) -> Dict[str, Any]:
+    """
+    Etapa $addFields que vacía video y materiales de las lecciones cuando `visible`
+    (expresión de agregación) es falso: el contenido protegido no sale de MongoDB.
+    """
+    return {"$addFields": {
+        "video_url": {"$cond": [visible, "$video_url", None]},
+        "video_id": {"$cond": [visible, "$video_id", None]},
+        "materials": {"$cond": [visible, "$materials", []]}
+    }}
@@ -1,5 +1,5 @@
-from beanie import Indexed
 from pydantic import EmailStr, Field
+from pymongo import IndexModel
 from typing import Optional
 from datetime import datetime
 from .base import BaseDocument
@@ -16,8 +16,8 @@ class User(BaseDocument):
     - USER: Estudiante.
     """
     
-    email: Indexed(EmailStr, unique=True)  # Email único e indexado
-    username: Indexed(str, unique=True) = None
+    email: EmailStr  # Único vía índice parcial (ver Settings.indexes)
+    username: Optional[str] = None  # Único vía índice parcial (ver Settings.indexes)
     full_name: str
     password_hash: str  # Contraseña hasheada con bcrypt
 
@@ -34,8 +34,22 @@ class User(BaseDocument):
     class Settings:
         name = "users"  # Nombre de la colección en MongoDB
         indexes = [
-            "email",
-            "username",
+            # Índices únicos PARCIALES (en lugar de Indexed(unique=True), que además
+            # quedaba anulado por el índice simple declarado aquí con la misma clave).
+            # Solo indexan valores string: varios usuarios pueden no tener username
+            # y el planner usa el índice con cualquier forma de predicado.
+            IndexModel(
+                [("email", 1)],
+                unique=True,
+                partialFilterExpression={"email": {"$type": "string"}},
+                name="email_partial_unique"
+            ),
+            IndexModel(
+                [("username", 1)],
+                unique=True,
+                partialFilterExpression={"username": {"$type": "string"}},
+                name="username_partial_unique"
+            ),
             "role",
             "is_active",
         ]
@@ -56,3 +70,4 @@ class User(BaseDocument):
     
     def __str__(self):
         return self.email
+
@@ -3,7 +3,7 @@ Router de Autenticación
 Endpoints para login, registro y gestión de cuenta
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Request
+from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile, Request, Response
 from typing import Optional
 
 from app.schemas.user_schema import (
@@ -40,7 +40,10 @@ async def login(request: Request, credentials: UserLogin):
     # Aplicar rate limit específico
     limiter.limit("5/15minute")(login)
     
-    return await auth_service.login(credentials)
+    token = await auth_service.login(credentials)
+    
+    # Serializar UNA sola vez con pydantic-core (evita que FastAPI re-valide el response_model)
+    return Response(content=token.model_dump_json(), media_type="application/json")
 
 
 @router.get("/me", response_model=UserResponse)
@@ -34,12 +34,17 @@ async def get_courses(
     difficulty: Optional[str] = None,
     status: Optional[str] = None,
     search: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="next_cursor de la página anterior (paginación keyset)"),
     current_user: Optional[User] = Depends(get_current_user_optional) # Opcional para acceso público
 ):
     """
     Listar cursos paginados.
     - Usuario logeado o usuario sin logear: Solo ve cursos PUBLISHED (y no eliminados).
     - Admin: Puede filtrar por cualquier status.
+    - cursor: Si se envía, se ignora page y se continúa desde el último curso visto
+      (más eficiente para scroll infinito; no retorna total ni pages).
+    - search: Búsqueda de texto en título, descripción y categoría (por palabras,
+      con stemming en español), ordenada por relevancia. No admite cursor.
     """
     return await CourseService.get_courses(
         page=page, 
@@ -48,7 +53,8 @@ async def get_courses(
         difficulty=difficulty, 
         status=status,
         search=search,
-        current_user=current_user
+        current_user=current_user,
+        cursor=cursor
     )
 
 @router.get("/{slug}", response_model=CourseDetailResponseSchema)
@@ -3,11 +3,15 @@ Router para endpoints de Enrollments (Inscripciones)
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from typing import Optional
+from beanie import PydanticObjectId
 from app.models.user import User
 from app.models.enums import EnrollmentStatus
 from app.schemas.enrollment_schema import (
     EnrollmentCreateSchema,
+    EnrollmentBulkCreateSchema,
+    EnrollmentBulkResultSchema,
     EnrollmentListResponse,
     EnrollmentResponseSchema,
     EnrollmentProgressUpdateSchema,
@@ -49,6 +53,36 @@ async def get_my_enrollments(
     )
 
 
+# Declarado antes de /{enrollment_id} para que "export" no se tome como ID
+@router.get("/export")
+async def export_enrollments(
+    search: Optional[str] = Query(None, description="Buscar por nombre de usuario o título de curso"),
+    user_id: Optional[PydanticObjectId] = Query(None, description="Filtrar por ID de estudiante"),
+    course_id: Optional[PydanticObjectId] = Query(None, description="Filtrar por ID de curso"),
+    status: Optional[EnrollmentStatus] = Query(None, description="Filtrar por estado"),
+    current_user: User = Depends(get_current_admin)
+):
+    """
+    Exportar inscripciones (Admin) en formato NDJSON.
+    
+    Mismos filtros que el listado admin, sin paginación: una línea JSON por
+    inscripción (con su curso embebido), enviada en streaming.
+    """
+    filters = {
+        "user_id": user_id,
+        "course_id": course_id,
+        "status": status
+    }
+    # Eliminar claves con valor None
+    filters = {k: v for k, v in filters.items() if v is not None}
+    
+    return StreamingResponse(
+        EnrollmentService.export_enrollments(search=search, filters=filters),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="enrollments.ndjson"'}
+    )
+
+
 @router.get("/{enrollment_id}", response_model=EnrollmentResponseSchema)
 async def get_enrollment(
     enrollment_id: str,
@@ -79,8 +113,8 @@ async def update_progress(
 @router.get("", response_model=EnrollmentListResponse)
 async def get_all_enrollments(
     search: Optional[str] = Query(None, description="Buscar por nombre de usuario o título de curso"),
-    user_id: Optional[str] = Query(None, description="Filtrar por ID de estudiante"),
-    course_id: Optional[str] = Query(None, description="Filtrar por ID de curso"),
+    user_id: Optional[PydanticObjectId] = Query(None, description="Filtrar por ID de estudiante"),
+    course_id: Optional[PydanticObjectId] = Query(None, description="Filtrar por ID de curso"),
     status: Optional[EnrollmentStatus] = Query(None, description="Filtrar por estado"),
     page: int = Query(1, ge=1, description="Número de página"),
     size: int = Query(10, ge=1, le=100, description="Items por página"),
@@ -121,6 +155,21 @@ async def create_enrollment(
     """
     return await EnrollmentService.create_enrollment(data, current_user)
 
+@router.post("/bulk", response_model=EnrollmentBulkResultSchema)
+async def create_enrollments_bulk(
+    data: EnrollmentBulkCreateSchema,
+    current_user: User = Depends(get_current_admin)
+):
+    """
+    Inscribir varios estudiantes en una sola petición (Admin).
+    
+    Hasta 500 items (user_id, course_id, notes). Cada inscripción se crea
+    igual que en POST /enrollments; los items inválidos (curso o usuario
+    inexistente, inscripción activa o repetida en la solicitud) se
+    devuelven en errors con su posición, sin detener al resto.
+    """
+    return await EnrollmentService.create_enrollments_bulk(data, current_user)
+
 @router.patch("/{enrollment_id}/extend", response_model=EnrollmentResponseSchema)
 async def extend_enrollment(
     enrollment_id: str,
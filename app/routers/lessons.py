@@ -2,7 +2,8 @@
 Router para endpoints de Lecciones (Clases)
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Body, UploadFile, File, Form
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Body, UploadFile, File, Form, Response
+from pydantic import TypeAdapter
 from typing import List, Optional
 from app.models.user import User
 from app.schemas.lesson_schema import (
@@ -16,6 +17,16 @@ from app.services.cloudinary_service import CloudinaryService
 from app.utils.dependencies import get_current_user, get_current_admin, get_current_user_optional
 # from app.routers.courses import get_current_admin # YA NO NECESARIO
 
+# Listas de lecciones: validar y serializar UNA sola vez con pydantic-core
+# (evita que FastAPI re-valide el response_model y luego codifique aparte)
+_LESSON_LIST_ADAPTER = TypeAdapter(List[LessonResponseSchema])
+
+
+def _lesson_list_response(lessons) -> Response:
+    lessons_data = _LESSON_LIST_ADAPTER.validate_python(lessons, from_attributes=True)
+    return Response(content=_LESSON_LIST_ADAPTER.dump_json(lessons_data), media_type="application/json")
+
+
 router = APIRouter(
     
     prefix="/api",
@@ -48,12 +59,14 @@ async def get_lessons_by_course(
     - NO USAR PARA PUBLICO (Usar GET /courses/{slug})
     """
     # Como es admin, is_preview no importa, ve todo
-    return await LessonService.get_lessons_by_course(course_id, current_user)
+    lessons = await LessonService.get_lessons_by_course(course_id, current_user)
+    return _lesson_list_response(lessons)
 
 @router.post("/courses/{course_id}/lessons", response_model=LessonResponseSchema, status_code=status.HTTP_201_CREATED)
 async def create_lesson(
     course_id: str,
     lesson_data: LessonCreateSchema,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_admin)
 ):
     """
@@ -62,19 +75,20 @@ async def create_lesson(
     Los campos de video (video_url, video_id) son opcionales.
     Puedes crear la lección sin video y subirlo después con PATCH.
     """
-    return await LessonService.create_lesson(course_id, lesson_data, current_user)
+    return await LessonService.create_lesson(course_id, lesson_data, current_user, background_tasks)
 
 
 @router.put("/lessons/{lesson_id}", response_model=LessonResponseSchema)
 async def update_lesson(
     lesson_id: str,
     lesson_data: LessonUpdateSchema,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_admin)
 ):
     """
     Actualizar lección (Admin).
     """
-    return await LessonService.update_lesson(lesson_id, lesson_data, current_user)
+    return await LessonService.update_lesson(lesson_id, lesson_data, current_user, background_tasks)
 
 @router.patch("/lessons/{lesson_id}/order", response_model=List[LessonResponseSchema])
 async def reorder_lesson(
@@ -86,15 +100,17 @@ async def reorder_lesson(
     Cambiar orden de una lección (Admin).
     Reordena automáticamente las demás. Retorna la lista actualizada.
     """
-    return await LessonService.reorder_lesson(lesson_id, order_data.order, current_user)
+    lessons = await LessonService.reorder_lesson(lesson_id, order_data.order, current_user)
+    return _lesson_list_response(lessons)
 
 @router.delete("/lessons/{lesson_id}")
 async def delete_lesson(
     lesson_id: str,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_admin)
 ):
     """
     Eliminar lección (Admin).
     Se elimina del curso y de la base de datos.
     """
-    return await LessonService.delete_lesson(lesson_id, current_user)
+    return await LessonService.delete_lesson(lesson_id, current_user, background_tasks)
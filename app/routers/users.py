@@ -3,17 +3,18 @@ Router de Gestión de Usuarios
 Endpoints administrativos para crear y gestionar usuarios
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Body, File, UploadFile, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Body, File, UploadFile, Query, Response
 from typing import Optional
+import re
 
-from app.schemas.user_schema import UserResponse, UserUpdate, UserCreate, PasswordValidationMixin, PaginatedResponse
+from app.schemas.user_schema import UserResponse, UserUpdate, UserCreate, PasswordValidationMixin, UserListResponse
 from app.models.user import User
 from app.models.enums import Role
 from app.utils.dependencies import get_current_admin, get_current_superadmin
 from app.services.auth_service import auth_service
 from app.services.cloudinary_service import cloudinary_service
 from app.schemas.user_schema import UserUpdate, UserCreate, PasswordValidationMixin
-from app.utils.security import hash_password
+from app.utils.security import ahash_password, clear_token_cache
 
 router = APIRouter(prefix="/api/users", tags=["User Management"])
 
@@ -62,7 +63,7 @@ async def create_user(user_data: UserCreate, current_user: User = Depends(get_cu
     return user
 
 
-@router.get("", response_model=PaginatedResponse[UserResponse])
+@router.get("", response_model=UserListResponse)
 async def list_users(
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=100),
@@ -87,11 +88,12 @@ async def list_users(
     import math
     
     # Query base: excluir usuarios eliminados lógicamente
-    query = User.find(User.is_deleted == False)
+    query = User.find(User.is_deleted == False, batch_size=per_page)
     
-    # Filtro de búsqueda general (búsqueda insensible a mayúsculas)
+    # Filtro de búsqueda general (búsqueda insensible a mayúsculas).
+    # El texto se escapa: se busca literal, sin interpretar metacaracteres de regex
     if q:
-        regex = {"$regex": q, "$options": "i"}
+        regex = {"$regex": re.escape(q), "$options": "i"}
         query = query.find(Or(
             User.email == regex,
             User.username == regex,
@@ -117,13 +119,16 @@ async def list_users(
     # Calcular total de páginas
     total_pages = math.ceil(total_count / per_page) if per_page > 0 else 0
     
-    return {
+    # Validar y serializar UNA sola vez (pydantic-core), sin re-validación de FastAPI
+    response = UserListResponse.model_validate({
         "total": total_count,
         "page": page,
         "per_page": per_page,
         "total_pages": total_pages,
         "data": users
-    }
+    }, from_attributes=True)
+    
+    return Response(content=response.model_dump_json(), media_type="application/json")
 
 
 
@@ -287,8 +292,9 @@ async def admin_reset_password(
             )
     
     # Hashear nueva contraseña
-    user.password_hash = hash_password(password_data.password)
+    user.password_hash = await ahash_password(password_data.password)
     await user.save()
+    clear_token_cache(str(user.id))
     
     return None
 
@@ -338,6 +344,7 @@ async def toggle_user_active(
     # Alternar estado
     user.is_active = not user.is_active
     await user.save()
+    clear_token_cache(str(user.id))
     
     return user
 
@@ -402,7 +409,7 @@ async def delete_user(
     - **ADMIN**: Borrado Lógico (Marca is_deleted=True).
     """
     from bson import ObjectId
-    from datetime import datetime
+    from app.models.base import utcnow
     
     try:
         user = await User.get(ObjectId(user_id))
@@ -425,7 +432,7 @@ async def delete_user(
             )
         # Borrado Lógico para ADMIN
         user.is_deleted = True
-        user.deleted_at = datetime.utcnow()
+        user.deleted_at = utcnow()
         await user.save()
         
     elif current_user.role == Role.SUPERADMIN:
@@ -437,4 +444,5 @@ async def delete_user(
         # Borrado Físico REAL para SUPERADMIN
         await user.delete()
     
+    clear_token_cache(str(user.id))
     return None
@@ -20,6 +20,27 @@ class EnrollmentCreateSchema(BaseModel):
     notes: Optional[str] = Field(None, max_length=500, description="Notas administrativas")
 
 
+class EnrollmentBulkCreateSchema(BaseModel):
+    """
+    Schema para inscribir varios estudiantes en una sola petición (solo admin).
+    Útil para importaciones (ej. desde CSV).
+    """
+    items: List[EnrollmentCreateSchema] = Field(..., min_length=1, max_length=500, description="Inscripciones a crear (máx 500)")
+
+
+class EnrollmentBulkErrorSchema(BaseModel):
+    """Item de la solicitud masiva que no se inscribió"""
+    index: int = Field(..., description="Posición del item en la solicitud")
+    detail: str = Field(..., description="Motivo")
+
+
+class EnrollmentBulkResultSchema(BaseModel):
+    """Resultado de la inscripción masiva"""
+    created: int = Field(..., description="Cantidad de inscripciones creadas")
+    enrollment_ids: List[PydanticObjectId] = Field(default_factory=list, description="IDs creados, en el orden de la solicitud")
+    errors: List[EnrollmentBulkErrorSchema] = Field(default_factory=list, description="Items rechazados")
+
+
 class EnrollmentProgressUpdateSchema(BaseModel):
     """
     Schema para actualizar progreso de video.
@@ -3,8 +3,8 @@ Schemas Pydantic para Usuario
 Validación y serialización de datos de usuarios
 """
 
-from pydantic import BaseModel, EmailStr, Field, field_validator, ConfigDict
-from typing import Optional, TypeVar, Generic, List
+from pydantic import BaseModel, EmailStr, Field, field_validator, ConfigDict, AfterValidator
+from typing import Optional, TypeVar, Generic, List, Annotated
 from datetime import datetime, date
 import re
 from beanie import PydanticObjectId
@@ -13,29 +13,58 @@ from app.models.enums import Role
 # Generic type for pagination
 T = TypeVar('T')
 
+# Patrones compilados una sola vez al importar el módulo
+_USERNAME_RE = re.compile(r'^[a-zA-Z0-9_-]+$')
+
+# Bits de clases de caracteres requeridas en contraseñas
+_PW_UPPER = 1
+_PW_LOWER = 2
+_PW_DIGIT = 4
+_PW_ALL = _PW_UPPER | _PW_LOWER | _PW_DIGIT
+
+
+def _check_pw_classes(v: str) -> int:
+    """
+    Recorre la contraseña UNA sola vez y retorna los bits de las clases
+    encontradas (mayúscula, minúscula, dígito). Termina en cuanto estén las tres.
+    """
+    flags = 0
+    for c in v:
+        o = ord(c)
+        if 65 <= o <= 90:
+            flags |= _PW_UPPER
+        elif 97 <= o <= 122:
+            flags |= _PW_LOWER
+        elif 48 <= o <= 57:
+            flags |= _PW_DIGIT
+        if flags == _PW_ALL:
+            break
+    return flags
+
+
+def _username_ok(v: str) -> str:
+    if not _USERNAME_RE.match(v):
+        raise ValueError('El username solo puede contener letras, números, guiones (-) y guiones bajos (_)')
+    return v
+
+
+def _full_name_ok(v: str) -> str:
+    return v.strip()
+
+
+# Tipos reutilizables: un único validador compartido por UserBase y UserUpdate
+Username = Annotated[str, Field(min_length=3, max_length=50), AfterValidator(_username_ok)]
+FullName = Annotated[str, Field(min_length=2, max_length=100), AfterValidator(_full_name_ok)]
+
 
 class UserBase(BaseModel):
     """Schema base para Usuario"""
     email: EmailStr
-    full_name: str = Field(..., min_length=2, max_length=100)
-    username: str = Field(None, min_length=3, max_length=50)
+    full_name: FullName
+    username: Username = None
     phone_number: Optional[str] = Field(None, pattern=r'^\+\d{5,15}$')
     birth_date: Optional[datetime] = None
 
-    @field_validator('username')
-    @classmethod
-    def validate_username(cls, v: Optional[str]) -> Optional[str]:
-        if v is None:
-            return v
-        if not re.match(r'^[a-zA-Z0-9_-]+$', v):
-            raise ValueError('El username solo puede contener letras, números, guiones (-) y guiones bajos (_)')
-        return v
-    
-    @field_validator('full_name')
-    @classmethod
-    def validate_full_name(cls, v: str) -> str:
-        return v.strip()
-
 
 class PasswordValidationMixin(BaseModel):
     """Mixin para validación de contraseñas """
@@ -46,11 +75,12 @@ class PasswordValidationMixin(BaseModel):
     def validate_password(cls, v):
         if len(v) < 8:
             raise ValueError('La contraseña debe tener al menos 8 caracteres')
-        if not re.search(r'[A-Z]', v):
+        flags = _check_pw_classes(v)
+        if not flags & _PW_UPPER:
             raise ValueError('La contraseña debe contener al menos una letra mayúscula')
-        if not re.search(r'[a-z]', v):
+        if not flags & _PW_LOWER:
             raise ValueError('La contraseña debe contener al menos una letra minúscula')
-        if not re.search(r'\d', v):
+        if not flags & _PW_DIGIT:
             raise ValueError('La contraseña debe contener al menos un número')
         return v
 
@@ -74,26 +104,10 @@ class UserCreate(UserBase, PasswordValidationMixin):
 class UserUpdate(BaseModel):
     """Schema para actualizar usuario (Datos textuales)"""
     email: Optional[EmailStr] = None
-    full_name: Optional[str] = Field(None, min_length=2, max_length=100)
-    username: Optional[str] = Field(None, min_length=3, max_length=50)
+    full_name: Optional[FullName] = None
+    username: Optional[Username] = None
     phone_number: Optional[str] = Field(None, pattern=r'^\+\d{5,15}$')
     birth_date: Optional[datetime] = None
-    
-    @field_validator('username')
-    @classmethod
-    def validate_username(cls, v: Optional[str]) -> Optional[str]:
-        if v is None:
-            return v
-        if not re.match(r'^[a-zA-Z0-9_-]+$', v):
-            raise ValueError('El username solo puede contener letras, números, guiones (-) y guiones bajos (_)')
-        return v
-    
-    @field_validator('full_name')
-    @classmethod
-    def validate_full_name(cls, v: Optional[str]) -> Optional[str]:
-        if v is None:
-            return v
-        return v.strip()
 
 
 class UserResponse(UserBase):
@@ -124,8 +138,6 @@ class UserResponse(UserBase):
                 "created_at": "2025-12-19T14:00:00Z",
                 "updated_at": "2025-12-19T14:00:00Z",
                 "created_by": "admin_id_123",
-                "updated_at": "2025-12-19T14:00:00Z",
-                "created_by": "admin_id_123",
                 "updated_by": "admin_id_123",
                 "phone_number": "+59170012345",
                 "birth_date": "1990-01-01"
@@ -136,8 +148,18 @@ class UserResponse(UserBase):
 
 class UserLogin(BaseModel):
     """Schema para login"""
-    email: EmailStr
+    # Solo se usa como clave de búsqueda: sin EmailStr (email-validator) en cada login
+    email: str = Field(..., max_length=254)
     password: str
+    
+    @field_validator('email')
+    @classmethod
+    def validate_email(cls, v):
+        local, at, domain = v.strip().rpartition('@')
+        if not at or not local or not domain:
+            raise ValueError('Email inválido')
+        # Igual que EmailStr al registrar: el dominio se guarda en minúsculas
+        return f"{local}@{domain.lower()}"
 
 
 class TokenResponse(BaseModel):
@@ -158,11 +180,12 @@ class ChangePasswordSchema(BaseModel):
     def validate_new_password(cls, v):
         if len(v) < 8:
             raise ValueError('La contraseña debe tener al menos 8 caracteres')
-        if not re.search(r'[A-Z]', v):
+        flags = _check_pw_classes(v)
+        if not flags & _PW_UPPER:
             raise ValueError('La contraseña debe contener al menos una letra mayúscula')
-        if not re.search(r'[a-z]', v):
+        if not flags & _PW_LOWER:
             raise ValueError('La contraseña debe contener al menos una letra minúscula')
-        if not re.search(r'\d', v):
+        if not flags & _PW_DIGIT:
             raise ValueError('La contraseña debe contener al menos un número')
         return v
     
@@ -181,3 +204,8 @@ class PaginatedResponse(BaseModel, Generic[T]):
     per_page: int       # Registros por página
     total_pages: int    # Total de páginas
     data: List[T]       # Lista de objetos
+
+
+class UserListResponse(PaginatedResponse[UserResponse]):
+    """Respuesta paginada de usuarios"""
+    pass
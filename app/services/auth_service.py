@@ -10,8 +10,9 @@ from fastapi import HTTPException, status
 from app.models.user import User
 from app.models.enums import Role
 from app.schemas.user_schema import UserCreate, UserSelfRegister, UserLogin, TokenResponse, UserResponse
-from app.utils.security import hash_password, verify_password, create_access_token
+from app.utils.security import ahash_password, averify_password, password_needs_rehash, create_access_token, clear_token_cache
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 
 
 class AuthService:
@@ -33,28 +34,12 @@ class AuthService:
         Raises:
             HTTPException 400: Si el email o username ya existe
         """
-        # Verificar si el email ya existe
-        existing_user = await User.find_one(User.email == user_data.email)
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="El email ya está registrado"
-            )
-        
-        # Verificar si el username ya existe
-        existing_username = await User.find_one(User.username == user_data.username)
-        if existing_username:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="El username ya está en uso"
-            )
-        
         # Crear nuevo usuario
         new_user = User(
             email=user_data.email,
             username=user_data.username,
             full_name=user_data.full_name,
-            password_hash=hash_password(user_data.password),
+            password_hash=await ahash_password(user_data.password),
             role=user_data.role,
             is_active=True,
             created_by=created_by,
@@ -63,7 +48,20 @@ class AuthService:
             birth_date=user_data.birth_date
         )
         
-        await new_user.insert()
+        # Sin lectura previa: los índices únicos de email/username garantizan la unicidad
+        try:
+            await new_user.insert()
+        except DuplicateKeyError as e:
+            key_pattern = (e.details or {}).get("keyPattern") or {}
+            if "username" in key_pattern or (not key_pattern and "username" in str(e)):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="El username ya está en uso"
+                )
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="El email ya está registrado"
+            )
         
         return new_user
     
@@ -92,7 +90,8 @@ class AuthService:
             )
         
         # Verificar contraseña
-        if not verify_password(credentials.password, user.password_hash):
+        password_ok = await averify_password(credentials.password, user.password_hash)
+        if not password_ok:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Email o contraseña incorrectos",
@@ -106,6 +105,12 @@ class AuthService:
                 detail="Usuario inactivo. Contacta al administrador."
             )
         
+        # Migración transparente: hashes bcrypt antiguos se regeneran con argon2
+        # ahora que tenemos la contraseña en claro (una sola vez por usuario)
+        if password_needs_rehash(user.password_hash):
+            new_hash = await ahash_password(credentials.password)
+            await user.set({User.password_hash: new_hash})
+        
         # Crear token JWT
         access_token = create_access_token(
             data={
@@ -116,11 +121,27 @@ class AuthService:
         )
         
         # Preparar respuesta de usuario
-        # Preparar respuesta de token (Pydantic serializará 'user' usando UserResponse)
-        return TokenResponse(
+        # model_construct NO re-valida: los datos vienen de un documento ya validado en BD
+        user_response = UserResponse.model_construct(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            username=user.username,
+            role=user.role,
+            is_active=user.is_active,
+            avatar_url=user.avatar_url,
+            phone_number=user.phone_number,
+            birth_date=user.birth_date,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+            created_by=user.created_by,
+            updated_by=user.updated_by
+        )
+
+        return TokenResponse.model_construct(
             access_token=access_token,
             token_type="bearer",
-            user=user  # Pasamos el modelo completo Beanie
+            user=user_response
         )
     
     @staticmethod
@@ -157,15 +178,17 @@ class AuthService:
             HTTPException 400: Si la contraseña actual es incorrecta
         """
         # Verificar contraseña actual
-        if not verify_password(current_password, user.password_hash):
+        password_ok = await averify_password(current_password, user.password_hash)
+        if not password_ok:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Contraseña actual incorrecta"
             )
         
         # Actualizar contraseña
-        user.password_hash = hash_password(new_password)
+        user.password_hash = await ahash_password(new_password)
         await user.save()
+        clear_token_cache(str(user.id))
         
         return {"message": "Contraseña actualizada exitosamente"}
 
@@ -4,6 +4,7 @@ from fastapi import UploadFile, HTTPException, status
 from app.config import settings
 from PIL import Image
 import io
+import asyncio
 
 # Configurar Cloudinary globalmente al importar
 cloudinary.config( 
@@ -13,6 +14,14 @@ cloudinary.config(
   secure = True
 )
 
+# Límite de píxeles: PIL lanza DecompressionBombError ante imágenes desproporcionadas
+Image.MAX_IMAGE_PIXELS = 4096 * 4096
+MAX_IMAGE_BYTES = 5 * 1024 * 1024
+
+# Formatos vetados (SVG puede contener scripts: riesgo de XSS)
+_BANNED_EXTS = frozenset({"svg", "svgz"})
+_BANNED_MIMES = frozenset({"image/svg+xml"})
+
 class CloudinaryService:
     @staticmethod
     async def upload_image(file: UploadFile, folder: str = "avatars") -> str:
@@ -31,33 +40,39 @@ class CloudinaryService:
         """
         
         # 1. Validar Content-Type
-        if not file.content_type.startswith("image/"):
+        content_type = file.content_type or ""
+        if content_type.partition("/")[0] != "image":
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="El archivo debe ser una imagen (jpg, png, etc.)"
             )
         
         # 1.5 Bloquear SVG explícitamente (riesgo de XSS)
-        if file.content_type == "image/svg+xml" or file.filename.lower().endswith('.svg'):
+        ext = (file.filename or "").rpartition(".")[2].lower()
+        if ext in _BANNED_EXTS or content_type in _BANNED_MIMES:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Los archivos SVG no están permitidos por seguridad"
             )
             
-        # 2. Leer archivo
-        content = await file.read()
+        # 2. Validar tamaño (Max 5MB) sin cargar el archivo en memoria
+        size = file.size
+        if size is None:
+            file.file.seek(0, io.SEEK_END)
+            size = file.file.tell()
+            file.file.seek(0)
         
-        # 3. Validar tamaño (Max 5MB)
-        if len(content) > 5 * 1024 * 1024:
+        if size > MAX_IMAGE_BYTES:
              raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="La imagen no puede pesar más de 5MB"
             )
         
-        # 4. Validar dimensiones (Max 4K: 4096x4096)
+        # 3. Validar dimensiones (Max 4K: 4096x4096)
+        # Image.open es perezoso: solo parsea la cabecera, .size no decodifica los píxeles
         try:
-            img = Image.open(io.BytesIO(content))
-            width, height = img.size
+            with Image.open(file.file) as img:
+                width, height = img.size
             
             if width > 4096 or height > 4096:
                 raise HTTPException(
@@ -71,12 +86,16 @@ class CloudinaryService:
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="El archivo no es una imagen válida"
             )
+        finally:
+            file.file.seek(0)
             
         try:
             # 4. Subir a Cloudinary
-            # Se usa el contenido en bytes directamente
-            response = cloudinary.uploader.upload(
-                content, 
+            # Se pasa el archivo subido directamente (sin copia intermedia en bytes)
+            # El SDK es bloqueante (HTTP síncrono): se ejecuta en un hilo para no frenar el event loop
+            response = await asyncio.to_thread(
+                cloudinary.uploader.upload,
+                file.file, 
                 folder=f"dulcevicio/{folder}",
                 resource_type="image"
             )
@@ -3,17 +3,25 @@ Servicio para lógica de negocio de Cursos
 REFACTORIZADO: Trabaja con relaciones Course-Lesson
 """
 
+import asyncio
+import hashlib
+import orjson
 from typing import List, Optional, Dict, Any
 from fastapi import UploadFile, HTTPException
+from beanie import PydanticObjectId
 from beanie.operators import In
-from app.models.course import Course
-from app.models.lesson import Lesson
+from bson import ObjectId
+from app.models.course import Course, CourseListView
+from app.models.enrollment import Enrollment, EnrollmentCourseView
+from app.models.lesson import Lesson, LessonCounter, lesson_gating_stage
 from app.models.user import User
-from app.models.enums import CourseStatus, Role
+from app.models.enums import CourseStatus, EnrollmentStatus, Role
 from app.schemas.course_schema import CourseCreateSchema, CourseUpdateSchema
 from app.utils.slug import generate_slug, ensure_unique_slug_course
 from app.services.cloudinary_service import CloudinaryService
-from datetime import datetime
+from app.cache import cache_get, cache_set, cache_delete, single_flight
+from app.config import settings
+from app.models.base import utcnow
 
 class CourseService:
     
@@ -23,7 +31,6 @@ class CourseService:
         Recalcula y guarda estadísticas del curso en DB.
         Debe llamarse cuando se agregan/eliminan/editan lecciones.
         """
-        from bson import ObjectId
         # Asegurar que sea ObjectId si viene como str
         if isinstance(course_id, str):
             try:
@@ -35,15 +42,26 @@ class CourseService:
         if not course:
             return
         
-        # Calcular estadísticas reales
-        lessons = await Lesson.find({"course_id": course.id}).to_list()
+        # Calcular estadísticas en MongoDB: un $group devuelve conteo y suma,
+        # sin traer los documentos de las lecciones a la app
+        stats = await Lesson.find({"course_id": course.id}).aggregate([
+            {"$group": {
+                "_id": None,
+                "count": {"$sum": 1},
+                "total_seconds": {"$sum": {"$ifNull": ["$duration_seconds", 0]}}
+            }}
+        ]).to_list()
+        count = stats[0]["count"] if stats else 0
+        total_seconds = stats[0]["total_seconds"] if stats else 0
         
-        course.lessons_count = len(lessons)
-        total_seconds = sum(l.duration_seconds or 0 for l in lessons)
-        course.total_duration_hours = round(total_seconds / 3600, 2)
-        
-        # Guardar cambios
-        await course.save()
+        # Guardar solo los campos de estadísticas ($set), no el documento completo
+        # updated_at también cambia: es la versión de las lecciones en caché
+        await course.set({
+            Course.lessons_count: count,
+            Course.total_duration_hours: round(total_seconds / 3600, 2),
+            Course.updated_at: utcnow()
+        })
+        await CourseService.invalidate_course_cache(course)
 
     @staticmethod
     async def get_courses(
@@ -53,11 +71,18 @@ class CourseService:
         difficulty: Optional[str] = None,
         status: Optional[str] = None,
         search: Optional[str] = None,
-        current_user: Optional[User] = None
+        current_user: Optional[User] = None,
+        cursor: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Obtener lista paginada de cursos con filtros.
         Calcula is_enrolled para cada curso según el usuario actual.
+        
+        Paginación:
+        - Sin cursor: paginación por página (skip/limit) con total y pages.
+        - Con cursor (keyset): continúa después del último _id visto, costo constante
+          sin importar la profundidad. No calcula total ni pages.
+        En ambos casos se retorna next_cursor para pedir la siguiente página.
         """
         query_filters = [Course.is_deleted == False]
         # Calcular vista pública basada en el usuario
@@ -79,62 +104,192 @@ class CourseService:
             query_filters.append(Course.difficulty == difficulty)
             
         if search:
-            query_filters.append({"title": {"$regex": search, "$options": "i"}})
+            if cursor:
+                raise HTTPException(status_code=400, detail="El cursor no es compatible con search")
+            # Índice de texto course_text (title, description, category): tokenizado y con stemming
+            query_filters.append({"$text": {"$search": search}})
 
-        query = Course.find(*query_filters)
-        total = await query.count()
+        # Vista pública: forzar el índice compuesto (status, is_deleted, _id).
+        # $text no admite hint: en ese caso el índice lo elige el propio $text
+        index_hint = {"hint": "pub_list"} if public_view and not search else {}
         
-        skip = (page - 1) * limit
-        courses = await query.sort("-created_at").skip(skip).limit(limit).to_list()
+        cursor_id = None
+        if cursor:
+            try:
+                cursor_id = PydanticObjectId(cursor)
+            except Exception:
+                raise HTTPException(status_code=400, detail="Cursor inválido")
         
-        # Calcular is_enrolled para cada curso
-        if current_user:
-            from app.models.enrollment import Enrollment
-            
-            # Verificar si es admin (acceso total)
-            if current_user.role in [Role.ADMIN, Role.SUPERADMIN]:
-                # Admin tiene acceso a todo
-                for course in courses:
-                    course.is_enrolled = True
-            else:
-                # Usuario regular: obtener enrollments activos en UNA sola query
-                enrollments = await Enrollment.find({
-                    "user_id": current_user.id,
-                    "status": "ACTIVE"
-                }).to_list()
-                
-                # Crear set de course_ids para búsqueda O(1)
-                enrolled_course_ids = set()
-                for e in enrollments:
-                    if await e.is_active_now():
-                        enrolled_course_ids.add(e.course_id)
-                
-                # Marcar cursos inscritos
-                for course in courses:
-                    course.is_enrolled = course.id in enrolled_course_ids
+        # La vista pública es la misma para anónimos y usuarios regulares: se cachea
+        # la página sin personalizar y is_enrolled se calcula en cada petición
+        cache_key = None
+        result = None
+        if public_view:
+            params = orjson.dumps([page, limit, category, difficulty, search, cursor])
+            cache_key = f"courses:{hashlib.sha1(params).hexdigest()}"
+            result = await cache_get(cache_key)
+        
+        if result is None:
+            result = await CourseService._fetch_courses_page(
+                query_filters, page, limit, search, cursor_id, index_hint
+            )
+            if cache_key:
+                await cache_set(cache_key, result, settings.COURSE_LIST_CACHE_TTL_SECONDS)
+        
+        await CourseService._set_is_enrolled(result["data"], current_user)
+        return result
 
-        # Convertir cursos a dicts e incluir is_enrolled manualmente
-        courses_data = []
-        for course in courses:
-            course_dict = course.model_dump(mode='json')
-            course_dict["is_enrolled"] = course.is_enrolled
-            courses_data.append(course_dict)
+    @staticmethod
+    async def _fetch_courses_page(
+        query_filters: list,
+        page: int,
+        limit: int,
+        search: Optional[str],
+        cursor_id: Optional[PydanticObjectId],
+        index_hint: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Consulta una página del listado (sin is_enrolled, que depende del usuario)"""
+        # Orden por _id descendente: el ObjectId incluye la fecha de creación,
+        # así que equivale a -created_at y sirve como clave del cursor
+        if cursor_id:
+            total = None
+            # batch_size = limit: la página completa llega en un solo batch del cursor
+            courses = await Course.find(
+                *query_filters, {"_id": {"$lt": cursor_id}}, batch_size=limit, **index_hint
+            ).sort("-_id").limit(limit).project(CourseListView).to_list()
+        else:
+            if search:
+                # Relevancia primero; _id desempata para un orden estable entre páginas
+                sort_stage = {"score": {"$meta": "textScore"}, "_id": -1}
+            else:
+                sort_stage = {"_id": -1}
+            
+            # Total y página en UNA sola agregación ($facet) en lugar de count + find
+            result = await Course.find(*query_filters).aggregate([
+                {"$sort": sort_stage},
+                {"$facet": {
+                    "metadata": [{"$count": "total"}],
+                    "data": [
+                        {"$skip": (page - 1) * limit},
+                        {"$limit": limit},
+                        # Solo los campos del listado salen de MongoDB
+                        {"$project": CourseListView.Settings.projection}
+                    ]
+                }}
+            ], **index_hint).to_list()
+            facet = result[0] if result else {"metadata": [], "data": []}
+            total = facet["metadata"][0]["total"] if facet["metadata"] else 0
+            courses = [CourseListView.model_validate(doc) for doc in facet["data"]]
+        
+        # Con search el orden es por relevancia: el _id no sirve como cursor
+        next_cursor = str(courses[-1].id) if len(courses) == limit and not search else None
+        
+        # Convertir cursos a dicts (is_enrolled se completa después, según el usuario)
+        courses_data = [{**course.model_dump(mode='json'), "is_enrolled": False} for course in courses]
+        
+        if total is None:
+            return {
+                "data": courses_data,
+                "limit": limit,
+                "next_cursor": next_cursor
+            }
         
         return {
             "data": courses_data,
             "total": total,
             "page": page,
             "limit": limit,
-            "pages": (total + limit - 1) // limit
+            "pages": (total + limit - 1) // limit,
+            "next_cursor": next_cursor
         }
 
+    @staticmethod
+    async def _set_is_enrolled(courses_data: List[Dict[str, Any]], current_user: Optional[User]):
+        """Marca is_enrolled en los cursos (dicts) de una página según el usuario actual"""
+        if not current_user or not courses_data:
+            return
+        
+        # Verificar si es admin (acceso total)
+        if current_user.role in [Role.ADMIN, Role.SUPERADMIN]:
+            for course_dict in courses_data:
+                course_dict["is_enrolled"] = True
+            return
+        
+        # Usuario regular: UNA sola query, limitada a los cursos de esta página.
+        # La vigencia (status ACTIVE y no expirada) se evalúa en MongoDB
+        enrollments = await Enrollment.find({
+            "user_id": current_user.id,
+            "course_id": {"$in": [PydanticObjectId(c["id"]) for c in courses_data]},
+            "status": EnrollmentStatus.ACTIVE,
+            "expires_at": {"$gt": utcnow()}
+        }).project(EnrollmentCourseView).to_list()
+        
+        # Crear set de course_ids para búsqueda O(1)
+        enrolled_course_ids = {str(e.course_id) for e in enrollments}
+        
+        for course_dict in courses_data:
+            course_dict["is_enrolled"] = course_dict["id"] in enrolled_course_ids
+
     @staticmethod
     async def get_course_by_slug(slug: str, current_user: Optional[User] = None) -> Dict[str, Any]:
-        """Obtener curso por slug con control de acceso híbrido"""
+        """
+        Obtener curso por slug con control de acceso híbrido.
+        
+        Curso y lecciones se cachean (si hay Redis) sin datos del usuario:
+        el curso por vista (admin/pública) y las lecciones por versión del
+        curso (updated_at) y variante (completa/restringida).
+        La inscripción se consulta en cada petición.
+        """
         # Calcular vista pública basada en el usuario
         is_admin = current_user and current_user.role in [Role.ADMIN, Role.SUPERADMIN]
         public_view = not is_admin
 
+        # Peticiones concurrentes por la misma clave comparten UNA carga (single-flight).
+        # El dict es compartido: se copia antes de agregar datos del usuario
+        course_key = f"course:{slug}:{'public' if public_view else 'admin'}"
+        course_dict = dict(await single_flight(
+            course_key, lambda: CourseService._load_course(course_key, slug, public_view)
+        ))
+        
+        course_id = PydanticObjectId(course_dict["id"])
+        
+        # Verificar inscripción y setear is_enrolled
+        is_enrolled = False
+        if current_user:
+            # Verificar si es admin (acceso total)
+            if is_admin:
+                is_enrolled = True
+            else:
+                # Verificar si tiene inscripción activa (vigencia evaluada en MongoDB)
+                enrollment = await Enrollment.find_one({
+                    "user_id": current_user.id,
+                    "course_id": course_id,
+                    "status": EnrollmentStatus.ACTIVE,
+                    "expires_at": {"$gt": utcnow()}
+                }).project(EnrollmentCourseView)
+                is_enrolled = enrollment is not None
+        
+        # --- NUEVO: Obtener y filtar Lecciones ---
+        # La versión (updated_at) cambia con cada escritura de lecciones/materiales
+        # (touch_course): las claves viejas no se borran, solo expiran
+        lessons_key = f"lessons:{course_id}:{course_dict['updated_at']}:{'full' if is_enrolled else 'gated'}"
+        lessons_data = await single_flight(
+            lessons_key, lambda: CourseService._load_lessons(lessons_key, course_id, is_enrolled)
+        )
+        
+        # 3. Agregar is_enrolled (exclude=True en modelo) y lecciones al curso
+        course_dict["is_enrolled"] = is_enrolled
+        course_dict["lessons"] = lessons_data
+
+        return course_dict
+
+    @staticmethod
+    async def _load_course(cache_key: str, slug: str, public_view: bool) -> Dict[str, Any]:
+        """Curso serializado (sin datos del usuario): desde caché o MongoDB"""
+        course_dict = await cache_get(cache_key)
+        if course_dict is not None:
+            return course_dict
+        
         # Usar filtros por diccionario para evitar problemas con Beanie Indexed fields
         query_filters = [{"slug": slug}, {"is_deleted": False}]
         
@@ -146,43 +301,52 @@ class CourseService:
         if not course:
             raise HTTPException(status_code=404, detail="Curso no encontrado")
         
-        # Verificar inscripción y setear is_enrolled
-        if current_user:
-            from app.models.enrollment import Enrollment
-            # Verificar si es admin (acceso total)
-            if current_user.role in [Role.ADMIN, Role.SUPERADMIN]:
-                course.is_enrolled = True
-            else:
-                # Verificar si tiene inscripción activa
-                enrollment = await Enrollment.find_one({
-                    "user_id": current_user.id,
-                    "course_id": course.id,
-                    "status": "ACTIVE"
-                })
-                if enrollment and await enrollment.is_active_now():
-                    course.is_enrolled = True
-        
-        # --- NUEVO: Obtener y filtar Lecciones ---
-        from app.models.lesson import Lesson
+        course_dict = course.model_dump(mode='json')
+        await cache_set(cache_key, course_dict, settings.COURSE_CACHE_TTL_SECONDS)
+        return course_dict
+
+    @staticmethod
+    async def _load_lessons(cache_key: str, course_id: PydanticObjectId, is_enrolled: bool) -> List[Dict[str, Any]]:
+        """Lecciones serializadas del curso (completas o restringidas): desde caché o MongoDB"""
+        lessons_data = await cache_get(cache_key)
+        if lessons_data is not None:
+            return lessons_data
         
         # 1. Obtener todas las lecciones del curso ordenadas
-        lessons = await Lesson.find({"course_id": course.id}).sort("order").to_list()
+        lesson_query = Lesson.find({"course_id": course_id}).sort("order")
         
-        # 2. Filtrar contenido sensible si NO está inscrito
-        if not course.is_enrolled:
-            for lesson in lessons:
-                # Si NO es preview, ocultar video y materiales
-                if not lesson.is_preview:
-                    lesson.video_url = None
-                    lesson.video_id = None
-                    lesson.materials = []
+        if is_enrolled:
+            lessons = await lesson_query.to_list()
+        else:
+            # 2. Sin inscripción: el contenido de las lecciones que NO son preview
+            # (video y materiales) se descarta en MongoDB, no llega a la app
+            docs = await lesson_query.aggregate([lesson_gating_stage("$is_preview")]).to_list()
+            lessons = [Lesson.model_validate(doc) for doc in docs]
         
-        # 3. Convertir curso a dict y agregar lecciones
-        course_dict = course.model_dump(mode='json')
-        course_dict["is_enrolled"] = course.is_enrolled  # Incluir manualmente (exclude=True en modelo)
-        course_dict["lessons"] = [lesson.model_dump(mode='json') for lesson in lessons]
+        lessons_data = [lesson.model_dump(mode='json') for lesson in lessons]
+        await cache_set(cache_key, lessons_data, settings.LESSONS_CACHE_TTL_SECONDS)
+        return lessons_data
 
-        return course_dict
+    @staticmethod
+    async def invalidate_course_cache(course: Course, *old_slugs: str):
+        """
+        Invalidar el curso (ambas vistas) en caché.
+        old_slugs: slugs anteriores del curso, si la actualización lo renombró
+        """
+        slugs = {course.slug, *old_slugs}
+        await cache_delete(*(f"course:{slug}:{view}" for slug in slugs for view in ("public", "admin")))
+
+    @staticmethod
+    async def touch_course(course_id):
+        """
+        Nueva versión del curso (updated_at) tras cambios en lecciones o materiales:
+        las lecciones en caché de la versión anterior dejan de usarse.
+        """
+        course = await Course.get(course_id)
+        if not course:
+            return
+        await course.set({Course.updated_at: utcnow()})
+        await CourseService.invalidate_course_cache(course)
 
     @staticmethod
     async def create_course(data: CourseCreateSchema, user: User) -> Course:
@@ -209,12 +373,15 @@ class CourseService:
             raise HTTPException(status_code=404, detail="Curso no encontrado")
             
         update_data = data.model_dump(exclude_unset=True)
+        # La caché va por slug: si cambia, hay que borrar también las claves del anterior
+        old_slug = course.slug
         
         for key, value in update_data.items():
             setattr(course, key, value)
             
         course.updated_by = str(user.id)
         await course.save()
+        await CourseService.invalidate_course_cache(course, old_slug)
         return course
 
     @staticmethod
@@ -228,10 +395,11 @@ class CourseService:
             course.status = status
             
             if status == CourseStatus.PUBLISHED and not course.published_at:
-                course.published_at = datetime.utcnow()
+                course.published_at = utcnow()
                 
             course.updated_by = str(user.id)
             await course.save()
+            await CourseService.invalidate_course_cache(course)
         
         return course
 
@@ -251,6 +419,7 @@ class CourseService:
             course.cover_image_url = url
             course.updated_by = str(user.id)
             await course.save()
+            await CourseService.invalidate_course_cache(course)
             
             return course
         except Exception as e:
@@ -268,16 +437,22 @@ class CourseService:
             raise HTTPException(status_code=404, detail="Curso no encontrado")
             
         if user.role == Role.SUPERADMIN:
-            # Borrado FÍSICO: eliminar lessons asociadas también
-            await Lesson.find({"course_id": course.id}).delete()
-            await course.delete()
+            # Borrado FÍSICO: eliminar lessons asociadas también.
+            # Son escrituras independientes: se envían en paralelo
+            await asyncio.gather(
+                Lesson.find({"course_id": course.id}).delete(),
+                LessonCounter.find({"_id": course.id}).delete(),
+                course.delete()
+            )
+            await CourseService.invalidate_course_cache(course)
             return {"message": "Curso eliminado permanentemente"}
         elif user.role == Role.ADMIN:
             # Borrado LÓGICO
             course.is_deleted = True
-            course.deleted_at = datetime.utcnow()
+            course.deleted_at = utcnow()
             course.updated_by = str(user.id)
             await course.save()
+            await CourseService.invalidate_course_cache(course)
             return {"message": "Curso enviado a papelera"}
         else:
              raise HTTPException(status_code=403, detail="No tienes permisos para eliminar cursos")
@@ -3,45 +3,208 @@ Servicio para lógica de negocio de Enrollments
 Gestión de inscripciones a cursos individuales
 """
 
-from typing import List, Optional, Dict, Any
+import asyncio
+import logging
+import re
+from typing import List, Optional, Dict, Any, Set, Tuple, AsyncIterator
+import orjson
 from fastapi import HTTPException
-from datetime import datetime
-from app.models.enrollment import Enrollment
+from beanie import PydanticObjectId
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import UpdateOne
+from datetime import datetime, timedelta
+from app.models.base import utcnow
+from app import cache
+from app.config import settings
+from app.models.enrollment import Enrollment, EnrollmentCourseView, EnrollmentExpiryView
 from app.models.course import Course
 from app.models.user import User
 from app.models.enums import EnrollmentStatus, Role
 from app.schemas.enrollment_schema import (
     EnrollmentCreateSchema,
+    EnrollmentBulkCreateSchema,
     EnrollmentProgressUpdateSchema,
     EnrollmentExtendSchema
 )
 
+logger = logging.getLogger(__name__)
+
+# Buffer de progreso en Redis: un hash por enrollment + set de enrollments pendientes
+_PROGRESS_KEY = "progress:{}"
+_PROGRESS_DIRTY_KEY = "progress:dirty"
+_PROGRESS_KEY_TTL = 3600  # Segundos; se renueva en cada heartbeat
+_PROGRESS_FLUSH_BATCH = 500
+
+# Campos de cada enrollment en listados y export (los de EnrollmentResponseSchema)
+_ENROLLMENT_ROW_FIELDS = (
+    "user_id", "course_id", "status", "enrolled_at", "expires_at",
+    "last_accessed_lesson_id", "last_video_position_seconds", "last_accessed_at",
+    "completed_at", "certificate_url", "notes",
+    "created_at", "updated_at", "created_by", "updated_by",
+)
+_ENROLLMENT_OID_FIELDS = frozenset({"user_id", "course_id", "last_accessed_lesson_id"})
+_ENROLLMENT_ROW_PROJECTION = {**dict.fromkeys(_ENROLLMENT_ROW_FIELDS, 1), "course": 1}
+
+# Campos del curso embebidos en cada enrollment de los listados
+_COURSE_EMBED_PROJECTION = {
+    "title": 1,
+    "slug": 1,
+    "cover_image_url": 1,
+    "price": 1,
+    "currency": 1
+}
+
 
 class EnrollmentService:
     
+    @staticmethod
+    def _search_stages(
+        search: Optional[str],
+        search_users: bool
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Etapas de búsqueda del listado de enrollments.
+        
+        Returns:
+            (etapas previas al orden, etapas que embeben el curso en cada fila).
+            Con search el curso ya se une al filtrar, así que las segundas van vacías.
+        """
+        course_lookup = {"$lookup": {
+            "from": Course.get_settings().name,
+            "localField": "course_id",
+            "foreignField": "_id",
+            "as": "course",
+            "pipeline": [{"$project": _COURSE_EMBED_PROJECTION}]
+        }}
+        
+        pipeline = []
+        if search:
+            # Escapado: búsqueda literal. $text no sirve aquí porque el filtro
+            # se aplica sobre campos unidos con $lookup (no sobre la colección)
+            regex = {"$regex": re.escape(search), "$options": "i"}
+            # El curso se une antes de filtrar: la página ya lo trae embebido
+            pipeline.append(course_lookup)
+            conditions = [{"course.title": regex}]
+            
+            if search_users:
+                pipeline.append({"$lookup": {
+                    "from": User.get_settings().name,
+                    "localField": "user_id",
+                    "foreignField": "_id",
+                    "as": "user",
+                    "pipeline": [{"$project": {"username": 1, "full_name": 1}}]
+                }})
+                conditions += [{"user.username": regex}, {"user.full_name": regex}]
+            
+            pipeline.append({"$match": {"$or": conditions}})
+            
+            if search_users:
+                pipeline.append({"$project": {"user": 0}})
+            
+            page_stages = []
+        else:
+            page_stages = [course_lookup]
+        
+        return pipeline, page_stages
+
+    @staticmethod
+    async def _paginate_with_course(
+        query_filters: List[Any],
+        page: int,
+        size: int,
+        search: Optional[str] = None,
+        search_users: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Página de enrollments con su curso embebido en UNA sola agregación:
+        $facet devuelve el total y la página, y $lookup trae solo los campos
+        del curso que usa el listado (sin segunda query a courses).
+        
+        Con search, el filtro por título del curso (y por username/full_name
+        del usuario si search_users) se resuelve dentro del mismo pipeline.
+        """
+        pipeline, page_stages = EnrollmentService._search_stages(search, search_users)
+        
+        pipeline += [
+            {"$sort": {"enrolled_at": -1}},
+            {"$facet": {
+                "metadata": [{"$count": "total"}],
+                "data": [
+                    {"$skip": (page - 1) * size},
+                    {"$limit": size},
+                    *page_stages,
+                    {"$unwind": {"path": "$course", "preserveNullAndEmptyArrays": True}},
+                    {"$project": _ENROLLMENT_ROW_PROJECTION}
+                ]
+            }}
+        ]
+        
+        result = await Enrollment.find(*query_filters).aggregate(pipeline).to_list()
+        facet = result[0] if result else {"metadata": [], "data": []}
+        total = facet["metadata"][0]["total"] if facet["metadata"] else 0
+        
+        # Convertir enrollments a dicts e incluir curso (un solo paso por fila)
+        enrollments_data = [EnrollmentService._enrollment_row(doc) for doc in facet["data"]]
+        
+        return {
+            "total": total,
+            "page": page,
+            "per_page": size,
+            "total_pages": (total + size - 1) // size,
+            "data": enrollments_data
+        }
+    
+    @staticmethod
+    def _enrollment_row(doc: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Fila del listado: enrollment + datos del curso embebido (si existe).
+        Se arma directo del documento proyectado, sin validar con Pydantic:
+        solo los ObjectId se pasan a str.
+        """
+        row = {"id": str(doc["_id"])}
+        for field in _ENROLLMENT_ROW_FIELDS:
+            value = doc.get(field)
+            row[field] = str(value) if value is not None and field in _ENROLLMENT_OID_FIELDS else value
+        
+        course = doc.get("course")
+        row["course"] = {
+            "id": str(course["_id"]),
+            "title": course["title"],
+            "slug": course["slug"],
+            "cover_image_url": course.get("cover_image_url"),
+            "price": course["price"],
+            "currency": course.get("currency", "USD")
+        } if course else None
+        return row
+    
     @staticmethod
     async def create_enrollment(data: EnrollmentCreateSchema, admin: User) -> Enrollment:
         """
         Crear enrollment (solo admin).
         El admin inscribe manualmente al estudiante.
         """
+        # Curso, usuario e inscripción previa son independientes: se consultan
+        # en paralelo (latencia de la más lenta, no la suma de las tres)
+        course, user, existing = await asyncio.gather(
+            Course.get(data.course_id),
+            User.get(data.user_id),
+            Enrollment.find_one(
+                Enrollment.user_id == data.user_id,
+                Enrollment.course_id == data.course_id,
+                Enrollment.status == EnrollmentStatus.ACTIVE
+            )
+        )
+        
         # Verificar que el curso existe
-        course = await Course.get(data.course_id)
         if not course or course.is_deleted:
             raise HTTPException(status_code=404, detail="Curso no encontrado")
         
         # Verificar que el usuario existe
-        user = await User.get(data.user_id)
         if not user or user.is_deleted:
             raise HTTPException(status_code=404, detail="Usuario no encontrado")
         
-        # Verificar si ya está inscrito
-        existing = await Enrollment.find_one(
-            Enrollment.user_id == data.user_id,
-            Enrollment.course_id == data.course_id,
-            Enrollment.status == EnrollmentStatus.ACTIVE
-        )
-        
+        # Verificar si ya está inscrito (is_active_now marca EXPIRED si ya venció)
         if existing and await existing.is_active_now():
             raise HTTPException(
                 status_code=400,
@@ -60,6 +223,88 @@ class EnrollmentService:
         
         return enrollment
     
+    @staticmethod
+    async def create_enrollments_bulk(data: EnrollmentBulkCreateSchema, admin: User) -> Dict[str, Any]:
+        """
+        Crear varias inscripciones (solo admin) con consultas por lote.
+        
+        Cursos, usuarios e inscripciones vigentes se validan con una consulta
+        $in cada una (en paralelo) y las inscripciones válidas se insertan
+        con un solo insert_many. Los items inválidos se informan en errors
+        sin detener al resto.
+        """
+        items = data.items
+        user_ids = list({item.user_id for item in items})
+        course_ids = list({item.course_id for item in items})
+        now = utcnow()
+        
+        valid_course_ids, valid_user_ids, active = await asyncio.gather(
+            Course.distinct("_id", {"_id": {"$in": course_ids}, "is_deleted": False}),
+            User.distinct("_id", {"_id": {"$in": user_ids}, "is_deleted": False}),
+            Enrollment.find({
+                "user_id": {"$in": user_ids},
+                "course_id": {"$in": course_ids},
+                "status": EnrollmentStatus.ACTIVE,
+                "expires_at": {"$gt": now}
+            }).aggregate([{"$project": {"_id": 0, "user_id": 1, "course_id": 1}}]).to_list()
+        )
+        accepted, errors = EnrollmentService._classify_bulk_items(
+            items,
+            valid_course_ids=set(valid_course_ids),
+            valid_user_ids=set(valid_user_ids),
+            taken={(doc["user_id"], doc["course_id"]) for doc in active}
+        )
+        new_enrollments = [
+            Enrollment.create_with_expiration(
+                user_id=item.user_id,
+                course_id=item.course_id,
+                notes=item.notes,
+                created_by=str(admin.id)
+            )
+            for item in accepted
+        ]
+        
+        enrollment_ids = []
+        if new_enrollments:
+            # ordered=False: el servidor no serializa los inserts uno tras otro
+            result = await Enrollment.insert_many(new_enrollments, ordered=False)
+            enrollment_ids = result.inserted_ids
+        
+        return {
+            "created": len(enrollment_ids),
+            "enrollment_ids": enrollment_ids,
+            "errors": errors
+        }
+    
+    @staticmethod
+    def _classify_bulk_items(
+        items: List[EnrollmentCreateSchema],
+        valid_course_ids: Set[PydanticObjectId],
+        valid_user_ids: Set[PydanticObjectId],
+        taken: Set[Tuple[PydanticObjectId, PydanticObjectId]]
+    ) -> Tuple[List[EnrollmentCreateSchema], List[Dict[str, Any]]]:
+        """
+        Separar los items de una inscripción masiva en aceptados y errores (sin BD).
+        
+        taken son los pares (usuario, curso) ya inscritos; los aceptados se suman
+        a una copia, así un par repetido en la misma solicitud se rechaza.
+        """
+        taken = set(taken)
+        accepted = []
+        errors = []
+        for index, item in enumerate(items):
+            pair = (item.user_id, item.course_id)
+            if item.course_id not in valid_course_ids:
+                errors.append({"index": index, "detail": "Curso no encontrado"})
+            elif item.user_id not in valid_user_ids:
+                errors.append({"index": index, "detail": "Usuario no encontrado"})
+            elif pair in taken:
+                errors.append({"index": index, "detail": "El usuario ya tiene una inscripción activa en este curso"})
+            else:
+                taken.add(pair)
+                accepted.append(item)
+        return accepted, errors
+    
     @staticmethod
     async def get_user_enrollments(
         user_id: str,
@@ -69,8 +314,6 @@ class EnrollmentService:
         size: int = 10
     ) -> Dict[str, Any]:
         """Obtener enrollments de un usuario con paginación y búsqueda"""
-        from bson import ObjectId
-        
         # Convertir user_id string a ObjectId
         try:
             user_oid = ObjectId(user_id)
@@ -90,71 +333,8 @@ class EnrollmentService:
         if status:
             query_filters.append({"status": status})
         
-        # Si hay búsqueda, necesitamos filtrar por título de curso
-        if search:
-            # Buscar cursos que coincidan
-            matching_courses = await Course.find(
-                {"title": {"$regex": search, "$options": "i"}}
-            ).to_list()
-            
-            if matching_courses:
-                course_ids = [c.id for c in matching_courses]
-                query_filters.append({"course_id": {"$in": course_ids}})
-            else:
-                # Si no hay cursos que coincidan, retornar vacío
-                return {
-                    "total": 0,
-                    "page": page,
-                    "per_page": size,
-                    "total_pages": 0,
-                    "data": []
-                }
-        
-        total = await Enrollment.find(*query_filters).count()
-        
-        # Calcular paginación
-        total_pages = (total + size - 1) // size
-        
-        # Obtener items
-        items = await Enrollment.find(*query_filters)\
-            .sort("-enrolled_at")\
-            .skip((page - 1) * size)\
-            .limit(size)\
-            .to_list()
-        
-        # Obtener IDs de cursos únicos
-        course_ids = list(set([e.course_id for e in items]))
-        
-        # Fetch cursos en una sola query
-        courses = await Course.find({"_id": {"$in": course_ids}}).to_list()
-        courses_dict = {c.id: c for c in courses}
-        
-        # Convertir enrollments a dicts e incluir curso
-        enrollments_data = []
-        for enrollment in items:
-            enrollment_dict = enrollment.model_dump(mode='json')
-            
-            # Agregar datos del curso si existe
-            course = courses_dict.get(enrollment.course_id)
-            if course:
-                enrollment_dict["course"] = {
-                    "id": str(course.id),
-                    "title": course.title,
-                    "slug": course.slug,
-                    "cover_image_url": str(course.cover_image_url) if course.cover_image_url else None,
-                    "price": course.price,
-                    "currency": course.currency
-                }
-            
-            enrollments_data.append(enrollment_dict)
-        
-        return {
-            "total": total,
-            "page": page,
-            "per_page": size,
-            "total_pages": total_pages,
-            "data": enrollments_data
-        }
+        # La búsqueda por título de curso se resuelve dentro de la agregación ($lookup + $match)
+        return await EnrollmentService._paginate_with_course(query_filters, page, size, search=search)
 
     @staticmethod
     async def get_all_enrollments(
@@ -164,6 +344,41 @@ class EnrollmentService:
         filters: Dict[str, Any] = None
     ) -> Dict[str, Any]:
         """Obtener todos los enrollments (Admin) con filtros, búsqueda y paginación"""
+        query_filters = EnrollmentService._admin_filters(filters)
+        
+        # Búsqueda en usuarios (username, full_name) Y cursos (título) dentro de la agregación
+        return await EnrollmentService._paginate_with_course(
+            query_filters, page, size, search=search, search_users=True
+        )
+    
+    @staticmethod
+    async def export_enrollments(
+        search: Optional[str] = None,
+        filters: Dict[str, Any] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Exportar enrollments (Admin) como NDJSON: una línea JSON por enrollment.
+        
+        Mismos filtros y búsqueda que get_all_enrollments, sin paginar.
+        Las filas se leen del cursor de la agregación y se emiten una a una,
+        sin cargar el resultado completo en memoria.
+        """
+        query_filters = EnrollmentService._admin_filters(filters)
+        pipeline, course_stages = EnrollmentService._search_stages(search, search_users=True)
+        pipeline += [
+            {"$sort": {"enrolled_at": -1}},
+            *course_stages,
+            {"$unwind": {"path": "$course", "preserveNullAndEmptyArrays": True}},
+            {"$project": _ENROLLMENT_ROW_PROJECTION}
+        ]
+        
+        # allowDiskUse: un export grande puede superar el límite de memoria del $sort
+        async for doc in Enrollment.find(*query_filters).aggregate(pipeline, allowDiskUse=True):
+            yield orjson.dumps(EnrollmentService._enrollment_row(doc)) + b"\n"
+    
+    @staticmethod
+    def _admin_filters(filters: Optional[Dict[str, Any]]) -> List[Any]:
+        """Filtros opcionales del listado admin (usuario, curso, estado)"""
         query_filters = []
         
         if filters:
@@ -174,89 +389,7 @@ class EnrollmentService:
             if filters.get("status"):
                 query_filters.append(Enrollment.status == filters["status"])
         
-        # Si hay búsqueda, buscar en usuarios Y cursos
-        if search:
-            matching_user_ids = []
-            matching_course_ids = []
-            
-            # Buscar usuarios por username o full_name
-            matching_users = await User.find(
-                {"$or": [
-                    {"username": {"$regex": search, "$options": "i"}},
-                    {"full_name": {"$regex": search, "$options": "i"}}
-                ]}
-            ).to_list()
-            matching_user_ids = [u.id for u in matching_users]
-            
-            # Buscar cursos por título
-            matching_courses = await Course.find(
-                {"title": {"$regex": search, "$options": "i"}}
-            ).to_list()
-            matching_course_ids = [c.id for c in matching_courses]
-            
-            # Filtrar enrollments que coincidan con usuarios O cursos
-            if matching_user_ids or matching_course_ids:
-                or_conditions = []
-                if matching_user_ids:
-                    or_conditions.append({"user_id": {"$in": matching_user_ids}})
-                if matching_course_ids:
-                    or_conditions.append({"course_id": {"$in": matching_course_ids}})
-                
-                query_filters.append({"$or": or_conditions})
-            else:
-                # Si no hay coincidencias, retornar vacío
-                return {
-                    "total": 0,
-                    "page": page,
-                    "per_page": size,
-                    "total_pages": 0,
-                    "data": []
-                }
-            
-        # Ejecutar query
-        query = Enrollment.find(*query_filters)
-        total = await query.count()
-        
-        total_pages = (total + size - 1) // size
-        
-        items = await query.sort("-enrolled_at")\
-            .skip((page - 1) * size)\
-            .limit(size)\
-            .to_list()
-        
-        # Obtener IDs de cursos únicos
-        course_ids = list(set([e.course_id for e in items]))
-        
-        # Fetch cursos en una sola query
-        courses = await Course.find({"_id": {"$in": course_ids}}).to_list()
-        courses_dict = {c.id: c for c in courses}
-        
-        # Convertir enrollments a dicts e incluir curso
-        enrollments_data = []
-        for enrollment in items:
-            enrollment_dict = enrollment.model_dump(mode='json')
-            
-            # Agregar datos del curso si existe
-            course = courses_dict.get(enrollment.course_id)
-            if course:
-                enrollment_dict["course"] = {
-                    "id": str(course.id),
-                    "title": course.title,
-                    "slug": course.slug,
-                    "cover_image_url": str(course.cover_image_url) if course.cover_image_url else None,
-                    "price": course.price,
-                    "currency": course.currency
-                }
-            
-            enrollments_data.append(enrollment_dict)
-            
-        return {
-            "total": total,
-            "page": page,
-            "per_page": size,
-            "total_pages": total_pages,
-            "data": enrollments_data
-        }
+        return query_filters
     
     @staticmethod
     async def get_enrollment_by_id(enrollment_id: str, user: User) -> Enrollment:
@@ -284,8 +417,55 @@ class EnrollmentService:
         """
         Actualizar progreso de video.
         Llamado por frontend cada 10-30 segundos.
+        
+        Con Redis: el progreso se guarda en un buffer y una tarea de fondo lo
+        vuelca a MongoDB por lotes (flush_progress_buffer). Dueño y expires_at se
+        leen de MongoDB en el primer heartbeat y quedan en el buffer: cada heartbeat
+        verifica la vigencia. Cancelar o extender la inscripción borra el buffer.
+        
+        Sin Redis: un solo update_one con $set de los campos de progreso.
+        Dueño y vigencia van en el filtro; solo si no coincide se lee el
+        documento para responder el error adecuado.
         """
-        enrollment = await Enrollment.get(enrollment_id)
+        try:
+            oid = PydanticObjectId(enrollment_id)
+        except Exception:
+            raise HTTPException(status_code=404, detail="Inscripción no encontrada")
+        
+        now = utcnow()
+        
+        if cache.redis_client:
+            try:
+                await EnrollmentService._buffer_progress(oid, data, user, now)
+                return {"message": "Progreso guardado correctamente"}
+            except HTTPException:
+                raise
+            except Exception as e:
+                # Redis no disponible: se escribe directo en MongoDB
+                logger.warning(f"⚠️ Buffer de progreso no disponible: {e}")
+        
+        result = await Enrollment.find_one({
+            "_id": oid,
+            "user_id": user.id,
+            "status": EnrollmentStatus.ACTIVE,
+            "expires_at": {"$gt": now}
+        }).update({"$set": {
+            "last_accessed_lesson_id": data.lesson_id,
+            "last_video_position_seconds": data.video_position_seconds,
+            "last_accessed_at": now,
+            "updated_at": now,
+            "updated_by": str(user.id)
+        }})
+        
+        if result.matched_count == 0:
+            await EnrollmentService._raise_progress_error(oid, user)
+        
+        return {"message": "Progreso guardado correctamente"}
+    
+    @staticmethod
+    async def _raise_progress_error(oid: PydanticObjectId, user: User):
+        """Lee el enrollment y lanza el error que corresponde a un progreso rechazado"""
+        enrollment = await Enrollment.get(oid)
         
         if not enrollment:
             raise HTTPException(status_code=404, detail="Inscripción no encontrada")
@@ -294,19 +474,118 @@ class EnrollmentService:
         if str(enrollment.user_id) != str(user.id):
             raise HTTPException(status_code=403, detail="No puedes actualizar esta inscripción")
         
-        # Verificar que no haya expirado
-        if not enrollment.is_active_now():
-            raise HTTPException(status_code=403, detail="Tu inscripción ha expirado")
+        # No vigente: is_active_now marca EXPIRED si la fecha ya pasó
+        await enrollment.is_active_now()
+        raise HTTPException(status_code=403, detail="Tu inscripción ha expirado")
+
+    @staticmethod
+    async def _buffer_progress(
+        oid: PydanticObjectId,
+        data: EnrollmentProgressUpdateSchema,
+        user: User,
+        now: datetime
+    ):
+        """Guarda el progreso en Redis y marca el enrollment como pendiente de volcar"""
+        redis = cache.redis_client
+        key = _PROGRESS_KEY.format(oid)
+        
+        progress = {
+            "user": str(user.id),
+            "lesson": str(data.lesson_id),
+            "pos": data.video_position_seconds,
+            "ts": now.isoformat()
+        }
         
-        # Actualizar progreso
-        enrollment.last_accessed_lesson_id = data.lesson_id
-        enrollment.last_video_position_seconds = data.video_position_seconds
-        enrollment.last_accessed_at = datetime.utcnow()
-        enrollment.updated_by = str(user.id)
+        owner, expires_at = await redis.hmget(key, "user", "exp")
+        if owner is not None and owner != str(user.id):
+            raise HTTPException(status_code=403, detail="No puedes actualizar esta inscripción")
         
-        await enrollment.save()
+        if owner is None or expires_at is None or datetime.fromisoformat(expires_at) <= now:
+            # Primer heartbeat, buffer expirado o vigencia vencida: verificar en MongoDB
+            enrollment = await Enrollment.find_one({
+                "_id": oid,
+                "user_id": user.id,
+                "status": EnrollmentStatus.ACTIVE,
+                "expires_at": {"$gt": now}
+            }).project(EnrollmentExpiryView)
+            if not enrollment:
+                await redis.delete(key)
+                await EnrollmentService._raise_progress_error(oid, user)
+            progress["exp"] = enrollment.expires_at.isoformat()
+        
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.hset(key, mapping=progress)
+            pipe.expire(key, _PROGRESS_KEY_TTL)
+            pipe.sadd(_PROGRESS_DIRTY_KEY, str(oid))
+            await pipe.execute()
+
+    @staticmethod
+    async def flush_progress_buffer() -> int:
+        """
+        Vuelca a MongoDB el progreso pendiente en Redis (un bulk_write por lote).
+        La vigencia se vuelve a exigir en el filtro: inscripciones canceladas
+        o expiradas no se actualizan.
         
-        return {"message": "Progreso guardado correctamente"}
+        Returns:
+            Cantidad de enrollments tomados del buffer
+        """
+        redis = cache.redis_client
+        if not redis:
+            return 0
+        
+        # SPOP es atómico: varios workers pueden volcar sin duplicar trabajo.
+        # Si llega otro heartbeat después, el id vuelve al set y se vuelca en la siguiente pasada
+        ids = await redis.spop(_PROGRESS_DIRTY_KEY, _PROGRESS_FLUSH_BATCH)
+        if not ids:
+            return 0
+        
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                for enrollment_id in ids:
+                    pipe.hgetall(_PROGRESS_KEY.format(enrollment_id))
+                entries = await pipe.execute()
+            
+            operations = []
+            for enrollment_id, entry in zip(ids, entries):
+                if not entry:
+                    continue
+                try:
+                    ts = datetime.fromisoformat(entry["ts"])
+                    operations.append(UpdateOne(
+                        {
+                            "_id": ObjectId(enrollment_id),
+                            "user_id": ObjectId(entry["user"]),
+                            "status": EnrollmentStatus.ACTIVE,
+                            "expires_at": {"$gt": ts}
+                        },
+                        {"$set": {
+                            "last_accessed_lesson_id": ObjectId(entry["lesson"]),
+                            "last_video_position_seconds": int(entry["pos"]),
+                            "last_accessed_at": ts,
+                            "updated_at": ts,
+                            "updated_by": entry["user"]
+                        }}
+                    ))
+                except (KeyError, ValueError, InvalidId) as e:
+                    # Entrada corrupta: se descarta sola, sin bloquear el resto del lote
+                    logger.warning(f"⚠️ Progreso inválido en buffer ({enrollment_id}): {e}")
+            
+            if operations:
+                await Enrollment.get_pymongo_collection().bulk_write(operations, ordered=False)
+        except Exception:
+            # El lote no llegó a MongoDB: devolver los ids al set para el siguiente intento
+            await redis.sadd(_PROGRESS_DIRTY_KEY, *ids)
+            raise
+        
+        return len(ids)
+    
+    @staticmethod
+    async def _forget_progress_buffer(enrollment_id) -> None:
+        """
+        Borrar el progreso bufferizado de un enrollment cuyo estado o vigencia cambió:
+        el siguiente heartbeat vuelve a verificar contra MongoDB
+        """
+        await cache.cache_delete(_PROGRESS_KEY.format(enrollment_id))
     
     @staticmethod
     async def extend_enrollment(
@@ -321,7 +600,6 @@ class EnrollmentService:
             raise HTTPException(status_code=404, detail="Inscripción no encontrada")
         
         # Extender fecha
-        from datetime import timedelta
         enrollment.expires_at = enrollment.expires_at + timedelta(days=data.additional_days)
         enrollment.updated_by = str(admin.id)
         
@@ -330,6 +608,7 @@ class EnrollmentService:
             enrollment.status = EnrollmentStatus.ACTIVE
         
         await enrollment.save()
+        await EnrollmentService._forget_progress_buffer(enrollment.id)
         
         return enrollment
     
@@ -345,5 +624,17 @@ class EnrollmentService:
         enrollment.updated_by = str(admin.id)
         
         await enrollment.save()
+        await EnrollmentService._forget_progress_buffer(enrollment.id)
         
         return {"message": "Inscripción cancelada correctamente"}
+
+
+async def run_progress_flusher():
+    """Tarea de fondo (con Redis): vuelca el buffer de progreso cada N segundos"""
+    while True:
+        await asyncio.sleep(settings.PROGRESS_FLUSH_INTERVAL_SECONDS)
+        try:
+            while await EnrollmentService.flush_progress_buffer() == _PROGRESS_FLUSH_BATCH:
+                pass
+        except Exception as e:
+            logger.error(f"❌ Error volcando progreso a MongoDB: {e}")
@@ -3,14 +3,69 @@ Servicio para lógica de negocio de Lecciones
 REFACTORIZADO: Usa relaciones por course_id en lugar de embebido
 """
 
+import asyncio
 from typing import List, Optional, Dict, Any
-from fastapi import HTTPException
+from fastapi import BackgroundTasks, HTTPException
+from beanie import PydanticObjectId
+from pymongo import ReturnDocument, UpdateOne
 from app.models.course import Course
-from app.models.lesson import Lesson
+from app.models.enrollment import Enrollment
+from app.models.lesson import Lesson, LessonCounter, lesson_gating_stage
 from app.models.user import User
-from app.models.enums import Role, CourseStatus
+from app.models.enums import Role, CourseStatus, EnrollmentStatus
 from app.schemas.lesson_schema import LessonCreateSchema, LessonUpdateSchema
-from datetime import datetime
+from app.services.course_service import CourseService
+from app.models.base import utcnow
+
+
+async def _none():
+    """Corrutina sin consulta, para omitir un elemento de asyncio.gather"""
+    return None
+
+
+async def _next_lesson_order(course_id: PydanticObjectId) -> int:
+    """
+    Reservar el siguiente orden de lección del curso con un $inc atómico
+    (dos altas concurrentes nunca obtienen el mismo orden)
+    """
+    counters = LessonCounter.get_pymongo_collection()
+    counter = await counters.find_one_and_update(
+        {"_id": course_id},
+        {"$inc": {"seq": 1}},
+        return_document=ReturnDocument.AFTER
+    )
+    if counter is None:
+        # Curso sin contador (lecciones creadas antes de existir): sembrar con el mayor orden actual.
+        # $max + upsert es idempotente si dos altas siembran a la vez
+        # Consulta cubierta por el índice course_order (solo devuelve order)
+        last_lesson = await Lesson.get_pymongo_collection().find_one(
+            {"course_id": course_id},
+            {"order": 1, "_id": 0},
+            sort=[("order", -1)]
+        )
+        await counters.update_one(
+            {"_id": course_id},
+            {"$max": {"seq": last_lesson["order"] if last_lesson else 0}},
+            upsert=True
+        )
+        counter = await counters.find_one_and_update(
+            {"_id": course_id},
+            {"$inc": {"seq": 1}},
+            return_document=ReturnDocument.AFTER
+        )
+    return counter["seq"]
+
+
+async def _refresh_course_stats(course_id: str, background_tasks: Optional[BackgroundTasks]):
+    """
+    Recalcular estadísticas del curso fuera del camino de la respuesta si hay BackgroundTasks
+    (se ejecuta justo después de enviarla); sin él, se espera como antes
+    """
+    if background_tasks is not None:
+        background_tasks.add_task(CourseService.update_course_stats, course_id)
+    else:
+        await CourseService.update_course_stats(course_id)
+
 
 class LessonService:
     
@@ -21,8 +76,6 @@ class LessonService:
         - Usuarios no inscritos: Solo ven metadata, videos bloqueados excepto preview
         - Usuarios inscritos/admin: Ven todo el contenido
         """
-        from app.models.enrollment import Enrollment
-        
         course = await Course.get(course_id)
         if not course or course.is_deleted:
             raise HTTPException(status_code=404, detail="Curso no encontrado")
@@ -32,32 +85,38 @@ class LessonService:
         if course.status != CourseStatus.PUBLISHED and not is_admin:
              raise HTTPException(status_code=404, detail="Curso no encontrado")
         
-        # Verificar inscripción
-        has_access = False
-        if user:
-            if is_admin:
-                has_access = True
-            else:
-                # Buscar enrollment activo
-                enrollment = await Enrollment.find_one({
-                    "user_id": user.id,
-                    "course_id": course.id,
-                    "status": "ACTIVE"
-                })
-                if enrollment and await enrollment.is_active_now():
-                    has_access = True
-             
-        # Consultar lessons por course_id
-        lessons = await Lesson.find({"course_id": course.id}).sort("+order").to_list()
+        lesson_query = Lesson.find({"course_id": course.id}).sort("+order")
         
-        # Si no tiene acceso, limpiar contenido sensible de lecciones no-preview
-        if not has_access:
-            for lesson in lessons:
-                if not lesson.is_preview:
-                    # Ocultar URLs de video y materiales
-                    lesson.video_url = None
-                    lesson.video_id = None
-                    lesson.materials = []
+        # Verificar inscripción.
+        # Sin acceso, video y materiales de las lecciones no-preview se vacían en MongoDB
+        if is_admin:
+            lessons = await lesson_query.to_list()
+        elif user:
+            # Lecciones + inscripción vigente en UNA sola agregación: el $lookup trae
+            # como máximo un enrollment ACTIVE no expirado del usuario para el curso
+            docs = await lesson_query.aggregate([
+                {"$lookup": {
+                    "from": Enrollment.get_settings().name,
+                    "localField": "course_id",
+                    "foreignField": "course_id",
+                    "as": "_enrollment",
+                    "pipeline": [
+                        {"$match": {
+                            "user_id": user.id,
+                            "status": EnrollmentStatus.ACTIVE,
+                            "expires_at": {"$gt": utcnow()}
+                        }},
+                        {"$limit": 1},
+                        {"$project": {"_id": 1}}
+                    ]
+                }},
+                lesson_gating_stage({"$or": ["$is_preview", {"$gt": [{"$size": "$_enrollment"}, 0]}]}),
+                {"$project": {"_enrollment": 0}}
+            ]).to_list()
+            lessons = [Lesson.model_validate(doc) for doc in docs]
+        else:
+            docs = await lesson_query.aggregate([lesson_gating_stage("$is_preview")]).to_list()
+            lessons = [Lesson.model_validate(doc) for doc in docs]
         
         return lessons
 
@@ -67,35 +126,36 @@ class LessonService:
         Obtener lección por ID con control de acceso.
         Bloquea lecciones no-preview para usuarios no inscritos.
         """
-        from app.models.enrollment import Enrollment
-        
         lesson = await Lesson.get(lesson_id)
         if not lesson:
             raise HTTPException(status_code=404, detail="Lección no encontrada")
         
-        # Obtener el curso para verificar permisos
-        course = await Course.get(lesson.course_id)
+        is_admin = user and user.role in [Role.ADMIN, Role.SUPERADMIN]
+        # El enrollment solo se consulta si decide el acceso (no admin, no preview)
+        check_enrollment = user and not is_admin and not lesson.is_preview
+        
+        # Curso y enrollment dependen solo de lesson.course_id: se consultan en paralelo
+        course, enrollment = await asyncio.gather(
+            Course.get(lesson.course_id),
+            Enrollment.find_one({
+                "user_id": user.id,
+                "course_id": lesson.course_id,
+                "status": "ACTIVE"
+            }) if check_enrollment else _none()
+        )
         if not course:
             raise HTTPException(status_code=404, detail="Curso no encontrado")
         
         # Verificar acceso
         has_access = False
-        is_admin = user and user.role in [Role.ADMIN, Role.SUPERADMIN]
         
         if is_admin:
             has_access = True
         elif lesson.is_preview:
             # Las lecciones preview son públicas
             has_access = True
-        elif user:
-            # Verificar enrollment
-            enrollment = await Enrollment.find_one({
-                "user_id": user.id,
-                "course_id": course.id,
-                "status": "ACTIVE"
-            })
-            if enrollment and await enrollment.is_active_now():
-                has_access = True
+        elif enrollment and await enrollment.is_active_now():
+            has_access = True
         
         # Si no tiene acceso a una lección no-preview, bloquear
         if not has_access and not lesson.is_preview:
@@ -111,63 +171,73 @@ class LessonService:
         return lesson
 
     @staticmethod
-    async def create_lesson(course_id: str, data: LessonCreateSchema, user: User) -> Lesson:
+    async def create_lesson(
+        course_id: str,
+        data: LessonCreateSchema,
+        user: User,
+        background_tasks: Optional[BackgroundTasks] = None
+    ) -> Lesson:
         """
         Crear lección y asociarla al curso.
         REFACTORIZADO: Ya no se agrega a lista embebida del curso
         """
-        # Import local para evitar circular si hubiera
-        from app.services.course_service import CourseService
+        try:
+            course_oid = PydanticObjectId(course_id)
+        except Exception:
+            raise HTTPException(status_code=404, detail="Curso no encontrado")
         
-        course = await Course.get(course_id)
+        course = await Course.get(course_oid)
         if not course:
             raise HTTPException(status_code=404, detail="Curso no encontrado")
-            
-        # Calcular orden: siempre al final
-        max_order_lesson = await Lesson.find(
-            {"course_id": course.id}
-        ).sort("-order").first_or_none()
         
-        next_order = (max_order_lesson.order + 1) if max_order_lesson else 1
+        # Orden de la nueva lección: siempre al final (contador atómico por curso)
+        next_order = await _next_lesson_order(course.id)
             
         # Crear documento Lesson con course_id
-        lesson_data = data.model_dump()
         lesson = Lesson(
-            **lesson_data,
+            **data.model_dump(),
             order=next_order,     # Asignar orden calculado
             course_id=course.id,  # Asociar al curso
             created_by=str(user.id)
         )
-        await lesson.save()
+        # insert (no save): documento nuevo, sin comprobar si ya existe
+        await lesson.insert()
         
-        # Actualizar estadísticas del curso
-        await CourseService.update_course_stats(str(course.id))
+        # Actualizar estadísticas del curso (en segundo plano si es posible)
+        await _refresh_course_stats(str(course.id), background_tasks)
         
         return lesson
 
     @staticmethod
-    async def update_lesson(lesson_id: str, data: LessonUpdateSchema, user: User) -> Lesson:
+    async def update_lesson(
+        lesson_id: str,
+        data: LessonUpdateSchema,
+        user: User,
+        background_tasks: Optional[BackgroundTasks] = None
+    ) -> Lesson:
         """
         Actualizar lección
         REFACTORIZADO: Ya no necesita sincronizar con Course
         """
-        # Import local
-        from app.services.course_service import CourseService
-        
         lesson = await Lesson.get(lesson_id)
         if not lesson:
             raise HTTPException(status_code=404, detail="Lección no encontrada")
             
         update_data = data.model_dump(exclude_unset=True)
-        for key, value in update_data.items():
-            setattr(lesson, key, value)
-            
-        lesson.updated_by = str(user.id)
-        await lesson.save()
         
-        # Si cambia la duración, recalcular stats
+        # $set solo con los campos enviados (no reemplaza el documento completo);
+        # Beanie actualiza también la instancia en memoria
+        await lesson.set({
+            **update_data,
+            "updated_by": str(user.id),
+            "updated_at": utcnow()
+        })
+        
+        # Si cambia la duración, recalcular stats (también invalida la caché del curso)
         if "duration_seconds" in update_data:
-            await CourseService.update_course_stats(str(lesson.course_id))
+            await _refresh_course_stats(str(lesson.course_id), background_tasks)
+        else:
+            await CourseService.touch_course(lesson.course_id)
             
         return lesson
 
@@ -197,25 +267,37 @@ class LessonService:
             insert_index = max(0, min(new_order - 1, len(all_lessons)))
             all_lessons.insert(insert_index, lesson)
             
-            # Recalcular order para todas
+            # Recalcular order para todas.
+            # OPTIMIZACIÓN: solo las que cambiaron, en UN bulk_write con $set
+            # (no un save() completo por lección)
+            now = utcnow()
+            operations = []
             for i, l in enumerate(all_lessons):
-                # OPTIMIZACIÓN: Solo guardar si cambió el orden
                 if l.order != i + 1:
                     l.order = i + 1
                     l.updated_by = str(user.id)
-                    await l.save()
+                    operations.append(UpdateOne(
+                        {"_id": l.id},
+                        {"$set": {"order": l.order, "updated_by": l.updated_by, "updated_at": now}}
+                    ))
+            
+            if operations:
+                await Lesson.get_pymongo_collection().bulk_write(operations, ordered=False)
+            
+            await CourseService.touch_course(lesson.course_id)
             
         return all_lessons
 
     @staticmethod
-    async def delete_lesson(lesson_id: str, user: User) -> Dict[str, str]:
+    async def delete_lesson(
+        lesson_id: str,
+        user: User,
+        background_tasks: Optional[BackgroundTasks] = None
+    ) -> Dict[str, str]:
         """
         Eliminar lección
         REFACTORIZADO: Solo elimina de la colección lessons
         """
-        # Import local
-        from app.services.course_service import CourseService
-        
         lesson = await Lesson.get(lesson_id)
         if not lesson:
             raise HTTPException(status_code=404, detail="Lección no encontrada")
@@ -230,12 +312,23 @@ class LessonService:
             {"course_id": course_id}
         ).sort("+order").to_list()
         
-        for i, l in enumerate(remaining_lessons):
-            if l.order != i + 1:
-                l.order = i + 1
-                await l.save()
+        now = utcnow()
+        operations = [
+            UpdateOne({"_id": l.id}, {"$set": {"order": i + 1, "updated_at": now}})
+            for i, l in enumerate(remaining_lessons)
+            if l.order != i + 1
+        ]
+        if operations:
+            await Lesson.get_pymongo_collection().bulk_write(operations, ordered=False)
+        
+        # El contador de orden vuelve a coincidir con el número de lecciones
+        await LessonCounter.get_pymongo_collection().update_one(
+            {"_id": course_id},
+            {"$set": {"seq": len(remaining_lessons)}},
+            upsert=True
+        )
                 
-        # Actualizar estadísticas del curso
-        await CourseService.update_course_stats(str(course_id))
+        # Actualizar estadísticas del curso (en segundo plano si es posible)
+        await _refresh_course_stats(str(course_id), background_tasks)
         
         return {"message": "Lección eliminada correctamente"}
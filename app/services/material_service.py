@@ -8,8 +8,10 @@ from fastapi import UploadFile, HTTPException, status
 from app.models.lesson import Lesson, LessonMaterial
 from app.models.user import User
 from app.services.cloudinary_service import CloudinaryService
-from datetime import datetime
+from app.services.course_service import CourseService
+from app.models.base import utcnow
 import os
+import asyncio
 
 class MaterialService:
     """
@@ -61,7 +63,8 @@ class MaterialService:
                 if len(content) > 10 * 1024 * 1024:
                     raise HTTPException(status_code=400, detail="El archivo excede 10MB")
                 
-                response = cloudinary.uploader.upload(
+                response = await asyncio.to_thread(
+                    cloudinary.uploader.upload,
                     content,
                     folder=f"dulcevicio/{folder}",
                     resource_type="raw",
@@ -87,14 +90,16 @@ class MaterialService:
             file_format=ext.replace('.', ''),
             is_downloadable=is_downloadable,
             order=max_order + 1,
-            created_at=datetime.utcnow(),
+            created_at=utcnow(),
             created_by=str(user.id)
         )
         
-        # PATRÓN EMBEBIDO: Agregar a lista y guardar padre
-        lesson.materials.append(material)
-        lesson.updated_by = str(user.id)
-        await lesson.save()
+        # PATRÓN EMBEBIDO: $push del material al padre (sin reescribir la lección completa)
+        await lesson.update({
+            "$push": {"materials": material.model_dump()},
+            "$set": {"updated_by": str(user.id), "updated_at": utcnow()}
+        })
+        await CourseService.touch_course(lesson.course_id)
         
         return material
 
@@ -108,10 +113,13 @@ class MaterialService:
         if not lesson:
             raise HTTPException(status_code=404, detail="Lección no encontrada")
             
-        # PATRÓN EMBEBIDO: Vaciar la lista
+        # PATRÓN EMBEBIDO: Vaciar la lista con $set
         deleted_count = len(lesson.materials)
-        lesson.materials = []
-        lesson.updated_by = str(user.id)
-        await lesson.save()
+        await lesson.set({
+            "materials": [],
+            "updated_by": str(user.id),
+            "updated_at": utcnow()
+        })
+        await CourseService.touch_course(lesson.course_id)
         
         return {"message": f"Se eliminaron {deleted_count} materiales correctamente"}
@@ -3,7 +3,7 @@ Dependencies para FastAPI
 Funciones reutilizables para autenticación y autorización
 """
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional
 from bson import ObjectId
@@ -17,16 +17,23 @@ security = HTTPBearer(auto_error=False)
 
 
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> User:
     """
     Obtener usuario actual desde el token JWT
     
-    Dependency para endpoints protegidos
+    Dependency para endpoints protegidos.
+    El usuario resuelto se guarda en request.state para que el resto de
+    dependencias de la misma petición no vuelvan a decodificar el token ni consultar la BD.
     
     Raises:
         HTTPException 401: Si el token es inválido o el usuario no existe
     """
+    cached_user = getattr(request.state, "current_user", None)
+    if cached_user is not None:
+        return cached_user
+    
     # Verificar que se proporcionó el token
     if credentials is None:
         raise HTTPException(
@@ -80,6 +87,7 @@ async def get_current_user(
             detail="Usuario inactivo"
         )
     
+    request.state.current_user = user
     return user
 
 
@@ -113,17 +121,19 @@ async def get_current_superadmin(current_user: User = Depends(get_current_user))
 
 
 async def get_current_user_optional(
+    request: Request,
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
 ) -> Optional[User]:
     """
     Obtener usuario actual si existe, sino retornar None
     
-    Útil para endpoints que funcionan con o sin autenticación
+    Útil para endpoints que funcionan con o sin autenticación.
+    Sin header Authorization retorna None sin tocar la BD.
     """
     if credentials is None:
         return None
     
     try:
-        return await get_current_user(credentials)
+        return await get_current_user(request, credentials)
     except HTTPException:
         return None
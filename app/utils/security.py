@@ -2,39 +2,97 @@
 Utilidades de seguridad: JWT y hashing de contraseñas
 """
 
-from datetime import datetime, timedelta
+import asyncio
+import os
+import time
+from datetime import timedelta
 from typing import Optional, Dict, Any
-from jose import JWTError, jwt
+import jwt
+from cachetools import TTLCache
 from passlib.context import CryptContext
 from app.config import settings
 
-# Contexto para hashing de contraseñas con bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Contexto para hashing de contraseñas: argon2 para hashes nuevos.
+# bcrypt se mantiene solo para verificar hashes ya guardados (deprecated="auto" los marca para rehash)
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__time_cost=2,
+    argon2__memory_cost=65536,
+    argon2__parallelism=2
+)
+
+# Cargar los backends (argon2-cffi / bcrypt) al importar y no en el primer login.
+# Solo detecta/importa el backend: no ejecuta el KDF
+for _scheme in pwd_context.schemes():
+    pwd_context.handler(_scheme).get_backend()
+
+# Opciones de verificación JWT fijadas una sola vez por proceso
+_ALGORITHMS = (settings.ALGORITHM,)
+_jwt_decoder = jwt.PyJWT(options={"require": ["exp"]})
+
+
+# Payloads de tokens ya verificados, por token completo.
+# Seguro: firma y exp van dentro del token; el usuario (activo/rol) se sigue leyendo de BD.
+# El TTL acota el tiempo que un token invalidado manualmente podría seguir aceptándose.
+_TOKEN_CACHE_MAXSIZE = 10_000
+_TOKEN_CACHE_TTL_SECONDS = 60
+_token_cache: TTLCache = TTLCache(maxsize=_TOKEN_CACHE_MAXSIZE, ttl=_TOKEN_CACHE_TTL_SECONDS)
+
+# Vigencia por defecto de los tokens (DEBUG no cambia en tiempo de ejecución)
+_DEFAULT_TOKEN_TTL_SECONDS = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
 
 
 import hashlib
 
+def _legacy_prehash(password: str) -> str:
+    """
+    Pre-hash SHA-256 usado por los hashes bcrypt antiguos.
+    Evitaba el límite de 72 bytes de Bcrypt; argon2 no lo necesita.
+    """
+    return hashlib.sha256(password.encode('utf-8')).hexdigest()
+
+
 def hash_password(password: str) -> str:
     """
-    Hash de contraseña usando SHA-256 + bcrypt.
-    
-    1. Pre-hasheamos con SHA-256 para obtener un string de longitud fija (64 chars).
-    2. Hasheamos eso con Bcrypt.
-    
-    Esto evita el límite de 72 bytes de Bcrypt y permite contraseñas de cualquier longitud.
+    Hash de contraseña usando argon2 (acepta contraseñas de cualquier longitud, sin pre-hash)
     """
-    # Pre-hash para seguridad y compatibilidad de longitud
-    password_safe = hashlib.sha256(password.encode('utf-8')).hexdigest()
-    return pwd_context.hash(password_safe)
+    return pwd_context.hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
-    Verificar contraseña contra hash (con pre-hash SHA-256)
+    Verificar contraseña contra hash.
+    Los hashes bcrypt antiguos se verifican con el mismo pre-hash SHA-256 con que se crearon.
     """
-    # Aplicar el mismo pre-hashing antes de verificar
-    password_safe = hashlib.sha256(plain_password.encode('utf-8')).hexdigest()
-    return pwd_context.verify(password_safe, hashed_password)
+    if pwd_context.identify(hashed_password) == "bcrypt":
+        return pwd_context.verify(_legacy_prehash(plain_password), hashed_password)
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+# argon2/bcrypt son CPU-bound: se ejecutan en hilos (no bloquean el event loop), como máximo
+# uno por núcleo. El throughput de login/cambio de contraseña queda acotado por _HASH_SEM
+_HASH_SEM = asyncio.Semaphore(os.cpu_count() or 2)
+
+
+async def ahash_password(password: str) -> str:
+    """hash_password fuera del event loop"""
+    async with _HASH_SEM:
+        return await asyncio.to_thread(hash_password, password)
+
+
+async def averify_password(plain_password: str, hashed_password: str) -> bool:
+    """verify_password fuera del event loop"""
+    async with _HASH_SEM:
+        return await asyncio.to_thread(verify_password, plain_password, hashed_password)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    True si el hash usa un esquema/parámetros obsoletos (ej. bcrypt) y debe regenerarse
+    tras un login correcto
+    """
+    return pwd_context.needs_update(hashed_password)
 
 
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
@@ -48,14 +106,9 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
     Returns:
         Token JWT codificado
     """
-    to_encode = data.copy()
-    
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    
-    to_encode.update({"exp": expire})
+    # exp como entero Unix directamente (sin construir datetime/timedelta)
+    ttl = int(expires_delta.total_seconds()) if expires_delta else _DEFAULT_TOKEN_TTL_SECONDS
+    to_encode = {**data, "exp": int(time.time()) + ttl}
     
     encoded_jwt = jwt.encode(
         to_encode,
@@ -70,21 +123,47 @@ def decode_access_token(token: str) -> Optional[Dict[str, Any]]:
     """
     Decodificar y verificar token JWT
     
+    Los tokens válidos se guardan en una caché TTL: las peticiones repetidas con el
+    mismo token evitan el HMAC y el parseo JSON (respetando siempre su exp).
+    
     Args:
         token: Token JWT a decodificar
         
     Returns:
         Payload del token si es válido, None si no es válido
     """
+    payload = _token_cache.get(token)
+    if payload is not None:
+        if payload["exp"] > time.time():
+            # Copia: quien llama no debe poder alterar la entrada cacheada
+            return dict(payload)
+        _token_cache.pop(token, None)
+    
     try:
-        payload = jwt.decode(
+        payload = _jwt_decoder.decode(
             token,
             settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM]
+            algorithms=_ALGORITHMS
         )
-        return payload
-    except JWTError:
+    except jwt.PyJWTError:
         return None
+    
+    _token_cache[token] = payload
+    return dict(payload)
+
+
+def clear_token_cache(user_id: Optional[str] = None) -> None:
+    """
+    Olvidar los tokens decodificados de un usuario (o todos si no se indica),
+    ej. al cambiar su contraseña, desactivarlo o eliminarlo, o al rotar SECRET_KEY
+    """
+    if user_id is None:
+        _token_cache.clear()
+        return
+    
+    for token, payload in list(_token_cache.items()):
+        if payload.get("user_id") == user_id:
+            _token_cache.pop(token, None)
 
 
 def validate_password_strength(password: str) -> tuple[bool, str]:
@@ -1,7 +1,7 @@
 import asyncio
-import json
+import orjson
+from pathlib import Path
 from bson import ObjectId
-from datetime import datetime
 from pydantic import HttpUrl
 from app.database import connect_to_mongo
 from app.models.user import User
@@ -9,42 +9,42 @@ from app.models.course import Course
 from app.models.lesson import Lesson
 from app.models.enrollment import Enrollment
 
-class MongoEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, ObjectId):
-            return str(obj)
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        if isinstance(obj, HttpUrl):
-            return str(obj)
-        if hasattr(obj, 'model_dump'):
-             return obj.model_dump(mode='json')
-        return super().default(obj)
+
+def _default(obj):
+    """Tipos que orjson no serializa de forma nativa (datetime y enums sí)"""
+    if isinstance(obj, (ObjectId, HttpUrl)):
+        return str(obj)
+    raise TypeError
+
+
+def _write_example(path: str, doc, exclude=None):
+    Path(path).write_bytes(
+        orjson.dumps(doc.model_dump(exclude=exclude), default=_default, option=orjson.OPT_INDENT_2)
+    )
+
 
 async def extract_examples():
     try:
         await connect_to_mongo()
-        
-        user = await User.find_one({})
-        if user:
-            with open('example_user.json', 'w', encoding='utf-8') as f:
-                json.dump(user.model_dump(mode='json'), f, cls=MongoEncoder, indent=2)
 
-        course = await Course.find_one({})
-        if course:
-            with open('example_course.json', 'w', encoding='utf-8') as f:
-                json.dump(course.model_dump(mode='json'), f, cls=MongoEncoder, indent=2)
+        # Colecciones distintas: las cuatro lecturas van en paralelo (un solo RTT de espera)
+        user, course, lesson, enrollment = await asyncio.gather(
+            User.find_one({}),
+            Course.find_one({}),
+            Lesson.find_one({}),
+            Enrollment.find_one({})
+        )
 
-        lesson = await Lesson.find_one({})
+        if user:
+            # El hash de contraseña no se publica en los ejemplos
+            _write_example('example_user.json', user, exclude={"password_hash"})
+        if course:
+            _write_example('example_course.json', course)
         if lesson:
-            with open('example_lesson.json', 'w', encoding='utf-8') as f:
-                json.dump(lesson.model_dump(mode='json'), f, cls=MongoEncoder, indent=2)
-            
-        enrollment = await Enrollment.find_one({})
+            _write_example('example_lesson.json', lesson)
         if enrollment:
-            with open('example_enrollment.json', 'w', encoding='utf-8') as f:
-                 json.dump(enrollment.model_dump(mode='json'), f, cls=MongoEncoder, indent=2)
-                 
+            _write_example('example_enrollment.json', enrollment)
+
         print("Archivos JSON generados exitosamente.")
 
     except Exception as e:
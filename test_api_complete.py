@@ -4,6 +4,7 @@ Script de prueba E2E completo para DulceVizzio API
 Prueba todos los endpoints de Course, Lesson y Material
 """
 
+import json
 import requests
 from urllib.parse import urlencode
 
@@ -294,15 +295,91 @@ def test_statistics(token, course_id):
     else:
         log_error(f"Error verificando estadísticas: {response.status_code}")
 
-def cleanup(token, course_id, lesson_ids):
+def test_bulk_enrollments(token, course_id):
+    """Prueba la inscripción masiva: item válido, repetido, curso y usuario inexistentes"""
+    log_section("6. INSCRIPCIONES MASIVAS (ENROLLMENT BULK)")
+    
+    headers = {'Authorization': f'Bearer {token}'}
+    missing_id = "0" * 24  # ObjectId válido que no existe
+    
+    response = requests.get(f"{BASE_URL}/api/auth/me", headers=headers)
+    if response.status_code != 200:
+        log_error(f"Error obteniendo usuario actual: {response.status_code}")
+        return []
+    user_id = response.json()['id']
+    
+    log_info("6.1 POST /api/enrollments/bulk - Inscribir en lote")
+    items = [
+        {"user_id": user_id, "course_id": course_id, "notes": "E2E bulk"},
+        {"user_id": user_id, "course_id": course_id},   # repetido en la misma solicitud
+        {"user_id": user_id, "course_id": missing_id},
+        {"user_id": missing_id, "course_id": course_id}
+    ]
+    response = requests.post(f"{BASE_URL}/api/enrollments/bulk", json={"items": items}, headers=headers)
+    if response.status_code != 200:
+        log_error(f"Error en inscripción masiva: {response.status_code} - {response.text}")
+        return []
+    
+    data = response.json()
+    errors = {e['index']: e['detail'] for e in data['errors']}
+    expected = {
+        1: "El usuario ya tiene una inscripción activa en este curso",
+        2: "Curso no encontrado",
+        3: "Usuario no encontrado"
+    }
+    if data['created'] == 1 and len(data['enrollment_ids']) == 1 and errors == expected:
+        log_success(f"Inscripción masiva correcta: 1 creada, rechazados {sorted(errors)}")
+    else:
+        log_error(f"Resultado inesperado: {data}")
+    
+    return data['enrollment_ids']
+
+def test_export_enrollments(token, course_id, enrollment_ids):
+    """Prueba la exportación NDJSON (la ruta /export debe ganar a /{enrollment_id})"""
+    log_section("7. EXPORTACIÓN DE INSCRIPCIONES (NDJSON)")
+    
+    headers = {'Authorization': f'Bearer {token}'}
+    
+    log_info(f"7.1 GET /api/enrollments/export?course_id={course_id} - Exportar inscripciones")
+    response = requests.get(
+        f"{BASE_URL}/api/enrollments/export",
+        params={"course_id": course_id},
+        headers=headers
+    )
+    if response.status_code != 200:
+        log_error(f"Error exportando inscripciones: {response.status_code} - {response.text}")
+        return
+    
+    try:
+        rows = [json.loads(line) for line in response.text.splitlines() if line]
+    except ValueError as e:
+        log_error(f"La respuesta no es NDJSON válido: {e}")
+        return
+    
+    exported_ids = {row['id'] for row in rows}
+    if response.headers.get('content-type', '').startswith('application/x-ndjson') and set(enrollment_ids) <= exported_ids:
+        log_success(f"Exportación correcta: {len(rows)} inscripciones")
+    else:
+        log_error(f"Exportación inesperada: {response.headers.get('content-type')} - {len(rows)} filas")
+
+def cleanup(token, course_id, lesson_ids, enrollment_ids):
     """Limpieza: eliminar datos de prueba"""
-    log_section("6. LIMPIEZA (CLEANUP)")
+    log_section("8. LIMPIEZA (CLEANUP)")
     
     headers = {'Authorization': f'Bearer {token}'}
     
+    # Cancelar inscripciones
+    for enrollment_id in enrollment_ids:
+        log_info(f"8.1 DELETE /api/enrollments/{enrollment_id} - Cancelar inscripción")
+        response = requests.delete(f"{BASE_URL}/api/enrollments/{enrollment_id}", headers=headers)
+        if response.status_code == 200:
+            log_success("Inscripción cancelada")
+        else:
+            log_error(f"Error cancelando inscripción: {response.status_code}")
+    
     # Eliminar lecciones
     for lesson_id in lesson_ids:
-        log_info(f"6.1 DELETE /lessons/{lesson_id} - Eliminar lección")
+        log_info(f"8.2 DELETE /lessons/{lesson_id} - Eliminar lección")
         response = requests.delete(f"{BASE_URL}/lessons/{lesson_id}", headers=headers)
         if response.status_code == 200:
             log_success("Lección eliminada")
@@ -310,7 +387,7 @@ def cleanup(token, course_id, lesson_ids):
             log_error(f"Error eliminando lección: {response.status_code}")
     
     # Eliminar curso
-    log_info(f"6.2 DELETE /courses/{course_id} - Eliminar curso")
+    log_info(f"8.3 DELETE /courses/{course_id} - Eliminar curso")
     response = requests.delete(f"{BASE_URL}/courses/{course_id}", headers=headers)
     if response.status_code == 200:
         log_success(f"Curso eliminado: {response.json()['message']}")
@@ -345,8 +422,14 @@ def main():
     # 5. Verificar estadísticas
     test_statistics(token, course_id)
     
-    # 6. Limpieza
-    cleanup(token, course_id, lesson_ids)
+    # 6. Inscripciones masivas
+    enrollment_ids = test_bulk_enrollments(token, course_id)
+    
+    # 7. Exportación
+    test_export_enrollments(token, course_id, enrollment_ids)
+    
+    # 8. Limpieza
+    cleanup(token, course_id, lesson_ids, enrollment_ids)
     
     print(f"\n{Colors.BOLD}{Colors.GREEN}{'='*70}{Colors.RESET}")
     print(f"{Colors.BOLD}{Colors.GREEN}🏁 PRUEBAS FINALIZADAS{Colors.RESET}")
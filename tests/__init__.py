@@ -1,3 +1,12 @@
 """
 Tests - Pruebas unitarias e integración
 """
+
+import os
+
+# Settings exige estas variables al importar la app; las pruebas unitarias no las usan
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-con-al-menos-32-caracteres")
+os.environ.setdefault("CLOUDINARY_CLOUD_NAME", "test")
+os.environ.setdefault("CLOUDINARY_API_KEY", "test")
+os.environ.setdefault("CLOUDINARY_API_SECRET", "test")
@@ -0,0 +1,34 @@
+"""
+Pruebas de la invalidación de caché de cursos (claves por slug)
+"""
+
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from app.services.course_service import CourseService
+
+
+class InvalidateCourseCacheTest(unittest.IsolatedAsyncioTestCase):
+
+    async def invalidate(self, *old_slugs):
+        with patch("app.services.course_service.cache_delete", new_callable=AsyncMock) as cache_delete:
+            await CourseService.invalidate_course_cache(SimpleNamespace(slug="nuevo"), *old_slugs)
+        cache_delete.assert_awaited_once()
+        return set(cache_delete.await_args.args)
+
+    async def test_deletes_both_views_of_current_slug(self):
+        self.assertEqual(await self.invalidate(), {"course:nuevo:public", "course:nuevo:admin"})
+
+    async def test_deletes_previous_slug_after_rename(self):
+        self.assertEqual(await self.invalidate("viejo"), {
+            "course:nuevo:public", "course:nuevo:admin",
+            "course:viejo:public", "course:viejo:admin"
+        })
+
+    async def test_unchanged_slug_is_not_duplicated(self):
+        self.assertEqual(await self.invalidate("nuevo"), {"course:nuevo:public", "course:nuevo:admin"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+Pruebas de la clasificación de items en la inscripción masiva (sin BD)
+"""
+
+import unittest
+
+from beanie import PydanticObjectId
+
+from app.schemas.enrollment_schema import EnrollmentCreateSchema
+from app.services.enrollment_service import EnrollmentService
+
+
+ALREADY_ENROLLED = "El usuario ya tiene una inscripción activa en este curso"
+
+
+class ClassifyBulkItemsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.user = PydanticObjectId()
+        self.other_user = PydanticObjectId()
+        self.course = PydanticObjectId()
+
+    def classify(self, items, taken=()):
+        return EnrollmentService._classify_bulk_items(
+            [EnrollmentCreateSchema(**item) for item in items],
+            valid_course_ids={self.course},
+            valid_user_ids={self.user, self.other_user},
+            taken=set(taken)
+        )
+
+    def test_valid_item_is_accepted(self):
+        accepted, errors = self.classify([{"user_id": self.user, "course_id": self.course, "notes": "csv"}])
+
+        self.assertEqual(errors, [])
+        self.assertEqual([(i.user_id, i.course_id, i.notes) for i in accepted], [(self.user, self.course, "csv")])
+
+    def test_repeated_pair_in_request_is_rejected(self):
+        item = {"user_id": self.user, "course_id": self.course}
+        accepted, errors = self.classify([item, item, {"user_id": self.other_user, "course_id": self.course}])
+
+        self.assertEqual([i.user_id for i in accepted], [self.user, self.other_user])
+        self.assertEqual(errors, [{"index": 1, "detail": ALREADY_ENROLLED}])
+
+    def test_existing_active_enrollment_is_rejected(self):
+        taken = {(self.user, self.course)}
+        accepted, errors = self.classify([{"user_id": self.user, "course_id": self.course}], taken=taken)
+
+        self.assertEqual(accepted, [])
+        self.assertEqual(errors, [{"index": 0, "detail": ALREADY_ENROLLED}])
+        # La copia interna no altera los pares recibidos
+        self.assertEqual(taken, {(self.user, self.course)})
+
+    def test_unknown_course_and_user_keep_their_index(self):
+        accepted, errors = self.classify([
+            {"user_id": self.user, "course_id": self.course},
+            {"user_id": self.user, "course_id": PydanticObjectId()},
+            {"user_id": PydanticObjectId(), "course_id": self.course},
+            # Curso y usuario inexistentes: se informa primero el curso
+            {"user_id": PydanticObjectId(), "course_id": PydanticObjectId()}
+        ])
+
+        self.assertEqual(len(accepted), 1)
+        self.assertEqual(errors, [
+            {"index": 1, "detail": "Curso no encontrado"},
+            {"index": 2, "detail": "Usuario no encontrado"},
+            {"index": 3, "detail": "Curso no encontrado"}
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+"""
+Pruebas de la caché de tokens decodificados (app.utils.security)
+"""
+
+import unittest
+
+from app.utils import security
+
+
+class TokenCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        security.clear_token_cache()
+        self.token_a = security.create_access_token({"user_id": "a", "email": "a@x.com", "role": "USER"})
+        self.token_b = security.create_access_token({"user_id": "b", "email": "b@x.com", "role": "USER"})
+        security.decode_access_token(self.token_a)
+        security.decode_access_token(self.token_b)
+
+    def tearDown(self):
+        security.clear_token_cache()
+
+    def test_clear_by_user_id_keeps_other_users(self):
+        security.clear_token_cache("a")
+
+        self.assertNotIn(self.token_a, security._token_cache)
+        self.assertIn(self.token_b, security._token_cache)
+
+    def test_clear_without_user_id_empties_cache(self):
+        security.clear_token_cache()
+
+        self.assertEqual(len(security._token_cache), 0)
+
+    def test_cached_payload_is_returned_as_copy(self):
+        payload = security.decode_access_token(self.token_a)
+        payload["user_id"] = "otro"
+
+        self.assertEqual(security.decode_access_token(self.token_a)["user_id"], "a")
+
+
+if __name__ == "__main__":
+    unittest.main()